@@ -0,0 +1,113 @@
+"""
+Control AIMD de los reportes simultáneos del CRM BeyondUp
+Sustituye al semáforo fijo del motor. La concurrencia pedida
+(MAX_CONCURRENCY, --concurrency, --sessions) es el techo y el nivel de
+partida: nunca se supera. Si los filtros o exportaciones fallan o se
+degradan (agotan el tiempo aprendido de su camino rápido, beyondup_timeouts)
+el número de trabajos a la vez se reduce a la mitad, y vuelve a subir de uno
+en uno mientras terminan bien. La duración total del paso no cuenta: un
+fallo de caché es lento sin que el CRM lo esté. Así a fin de mes se deja
+respirar al CRM sin bajar la concurrencia a mano. El nivel elegido se
+publica como la métrica beyondup_concurrency_limit.
+"""
+
+from collections import deque
+import asyncio
+import time
+import os
+
+from beyondup_metrics import on_step, off_step, set_gauge
+
+ADAPTIVE_CONCURRENCY = os.getenv('ADAPTIVE_CONCURRENCY', 'true').lower() == 'true'
+AIMD_MIN_CONCURRENCY = int(os.getenv('AIMD_MIN_CONCURRENCY', '1'))
+# Factor de reducción ante un paso fallido o degradado
+AIMD_DECREASE = float(os.getenv('AIMD_DECREASE', '0.5'))
+# Tras una reducción, los fallos de los pasos ya en curso no vuelven a reducir
+AIMD_COOLDOWN_SECONDS = float(os.getenv('AIMD_COOLDOWN_SECONDS', '30'))
+# Pasos cuya latencia y errores gobiernan la concurrencia
+AIMD_STEPS = tuple(s.strip() for s in os.getenv('AIMD_STEPS', 'filter,export').split(',') if s.strip())
+
+class AIMDLimiter:
+    """
+    Semáforo con límite ajustable (async with limiter: ...) entre minimum y maximum
+    Aumento aditivo: +1 tras `limit` pasos buenos seguidos (una ronda completa)
+    Reducción multiplicativa: × AIMD_DECREASE ante un paso fallido o degradado
+    """
+
+    def __init__(self, maximum, minimum=AIMD_MIN_CONCURRENCY):
+        self.max = max(1, maximum)
+        self.min = min(max(1, minimum), self.max)
+        self.limit = self.max
+        self.active = 0
+        self.good = 0
+        self.last_decrease = 0.0
+        self.history = deque(maxlen=20)
+        self._waiters = deque()
+        on_step(self.observe)
+        self._publish()
+
+    def _publish(self):
+        set_gauge('beyondup_concurrency_limit', self.limit, 'Reportes simultáneos permitidos (AIMD)')
+        set_gauge('beyondup_concurrency_active', self.active, 'Reportes en curso')
+
+    def _wake(self):
+        while self._waiters and self.active < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.active += 1
+                waiter.set_result(None)
+        self._publish()
+
+    async def __aenter__(self):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self._publish()
+            return self
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Ya se le había dado el hueco: devolverlo
+                self.active -= 1
+                self._wake()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self.active -= 1
+        self._wake()
+
+    def _set(self, limit, reason):
+        limit = min(max(limit, self.min), self.max)
+        if limit != self.limit:
+            print(f"   {'📈' if limit > self.limit else '📉'} Concurrencia {self.limit} → {limit} ({reason})")
+            self.history.append({'at': time.strftime('%H:%M:%S'), 'limit': limit, 'reason': reason})
+            self.limit = limit
+        self._wake()
+
+    def observe(self, record):
+        """Listener de beyondup_metrics: ajustar el límite con cada filtro o exportación"""
+        if record['step'] not in AIMD_STEPS:
+            return
+        if record['outcome'] != 'ok':
+            self.good = 0
+            now = time.monotonic()
+            if now - self.last_decrease >= AIMD_COOLDOWN_SECONDS:
+                self.last_decrease = now
+                self._set(int(self.limit * AIMD_DECREASE), f"{record['step']} {record['outcome']}")
+            return
+
+        self.good += 1
+        if self.good >= self.limit and self.active >= self.limit:
+            # Solo se sube si el límite actual se está usando
+            self.good = 0
+            self._set(self.limit + 1, f"{record['step']} correcto")
+
+    def close(self):
+        off_step(self.observe)
+
+    def status(self):
+        return {'limit': self.limit, 'active': self.active, 'waiting': len(self._waiters),
+                'min': self.min, 'max': self.max, 'history': list(self.history)}
@@ -0,0 +1,75 @@
+"""
+Buffer circular en memoria de capturas, DOM y consola por página
+Casi todas las ejecuciones terminan bien y sus capturas no se miran nunca:
+en lugar de escribirlas, cada página guarda en memoria las últimas
+ARTIFACT_BUFFER capturas (con su DOM) y las últimas líneas de consola. Solo
+se escriben a disco si el trabajo falla; con DEBUG=true se escribe todo
+directamente, como antes.
+"""
+
+from collections import deque
+from datetime import datetime
+import weakref
+import os
+
+from beyondup_screenshots import grab, enqueue
+
+# Capturas (con su DOM) que se conservan por página; 0 desactiva el buffer
+ARTIFACT_BUFFER = int(os.getenv('ARTIFACT_BUFFER', '8'))
+# Líneas de consola del navegador que se conservan por página
+ARTIFACT_CONSOLE_LINES = int(os.getenv('ARTIFACT_CONSOLE_LINES', '200'))
+DEBUG = os.getenv('DEBUG', 'false').lower() == 'true'
+
+_buffers = weakref.WeakKeyDictionary()
+
+class ArtifactBuffer:
+    """Últimas capturas y líneas de consola de una página"""
+
+    def __init__(self):
+        self.captures = deque(maxlen=ARTIFACT_BUFFER)
+        self.console = deque(maxlen=ARTIFACT_CONSOLE_LINES)
+
+    def log(self, line):
+        self.console.append(f"{datetime.now().strftime('%H:%M:%S.%f')[:-3]} {line}")
+
+def attach(page):
+    """Empezar a bufferizar los artefactos de la página (salvo en modo DEBUG)"""
+    if DEBUG or ARTIFACT_BUFFER <= 0:
+        return None
+    buffer = _buffers[page] = ArtifactBuffer()
+    page.on('console', lambda msg: buffer.log(f"[{msg.type}] {msg.text}"))
+    page.on('pageerror', lambda error: buffer.log(f"[pageerror] {error}"))
+    return buffer
+
+def is_buffered(page):
+    return page in _buffers
+
+async def record(page, filepath):
+    """Guardar en memoria la captura y el DOM actuales; se escribirán en filepath si hay fallo"""
+    data = await grab(page)
+    try:
+        dom = await page.content()
+    except Exception:
+        dom = None
+    _buffers[page].captures.append((filepath, data, dom))
+
+async def flush(page, console_path):
+    """Escribir a disco el contenido del buffer de la página y vaciarlo; devuelve los archivos"""
+    buffer = _buffers.get(page)
+    if not buffer:
+        return 0
+
+    written = 0
+    for filepath, data, dom in buffer.captures:
+        await enqueue(filepath, data)
+        written += 1
+        if dom:
+            await enqueue(filepath.with_suffix('.html'), dom.encode('utf-8'), is_image=False)
+            written += 1
+    if buffer.console:
+        await enqueue(console_path, '\n'.join(buffer.console).encode('utf-8'), is_image=False)
+        written += 1
+
+    buffer.captures.clear()
+    buffer.console.clear()
+    return written
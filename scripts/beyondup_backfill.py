@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Backfill histórico de Tareas Cerradas del CRM BeyondUp
+Divide un rango de fechas en trimestres (o meses) y exporta los trozos en
+varias páginas a la vez sobre una misma sesión. Cada trabajo exporta un
+lote de trozos desde una sola vista (solo se reabre el diálogo Filtro).
+El estado de cada trozo se guarda en BACKFILL_STATE_FILE al terminarlo, de
+modo que un backfill interrumpido se reanuda por donde iba. Los trozos cuya
+exportación falló tras pulsar Aceptar quedan como 'uncertain' (el correo
+puede haber salido) y no se repiten sin --retry-uncertain.
+
+Uso:
+    python3 beyondup_backfill.py --start 01/01/2021
+    python3 beyondup_backfill.py --start 01/01/2023 --end 31/12/2024 --chunk month --sessions 4
+    python3 beyondup_backfill.py --start 01/01/2021 --status
+    python3 beyondup_backfill.py --start 01/01/2021 --retry-uncertain
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import asyncio
+import sys
+import os
+
+from beyondup_common import MAX_CONCURRENCY, check_credentials, read_json, write_json
+
+BACKFILL_STATE_FILE = Path(os.getenv('BACKFILL_STATE_FILE', '/tmp/beyondup_backfill.json'))
+# Trozos exportados por trabajo (desde la misma vista)
+BACKFILL_BATCH = int(os.getenv('BACKFILL_BATCH', '4'))
+
+CHUNK_MONTHS = {'quarter': 3, 'month': 1}
+
+def last_closed_day(today, chunk='quarter'):
+    """Último día del último trimestre (o mes) ya cerrado antes de today"""
+    months = CHUNK_MONTHS[chunk]
+    first_month = (today.month - 1) // months * months + 1
+    return datetime(today.year, first_month, 1) - timedelta(days=1)
+
+def split_range(start, end, chunk='quarter'):
+    """
+    Trozos (fecha_inicio, fecha_fin, etiqueta) alineados con trimestres o
+    meses naturales; el primero y el último se recortan a start/end
+    """
+    months = CHUNK_MONTHS[chunk]
+    chunks = []
+    cursor = start
+    while cursor <= end:
+        first_month = (cursor.month - 1) // months * months + 1
+        period_start = datetime(cursor.year, first_month, 1)
+        next_month = first_month + months
+        next_start = datetime(cursor.year + (next_month - 1) // 12, (next_month - 1) % 12 + 1, 1)
+        chunk_end = min(end, next_start - timedelta(days=1))
+
+        if cursor != period_start or chunk_end != next_start - timedelta(days=1):
+            label = f"{cursor:%d/%m/%Y}-{chunk_end:%d/%m/%Y}"
+        elif chunk == 'quarter':
+            label = f"Q{(first_month - 1) // 3 + 1}-{cursor.year}"
+        else:
+            label = f"{cursor.year}-{first_month:02d}"
+        chunks.append((cursor.strftime('%d/%m/%Y'), chunk_end.strftime('%d/%m/%Y'), label))
+        cursor = next_start
+    return chunks
+
+class BackfillState:
+    """
+    Estado de los trozos de un reporte y tamaño de trozo en BACKFILL_STATE_FILE
+    No depende del rango pedido: al ampliarlo solo se exportan los trozos nuevos
+    (y el último trozo recortado, que cambia de etiqueta al crecer)
+    """
+
+    def __init__(self, report, chunk, path=BACKFILL_STATE_FILE):
+        self.path = path
+        self.key = f"{report}:{chunk}"
+        self.data = read_json(path, {})
+        self.entry = self.data.setdefault(self.key, {
+            'report': report,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'chunks': {},
+        })
+
+    def status(self, label):
+        return self.entry['chunks'].get(label, {}).get('status', 'pending')
+
+    def mark(self, chunk, status, error=None):
+        fecha_inicio, fecha_fin, label = chunk
+        self.entry['chunks'][label] = {
+            'range': [fecha_inicio, fecha_fin],
+            'status': status,
+            'error': error,
+            'at': datetime.now().isoformat(timespec='seconds'),
+        }
+        self.save()
+
+    def save(self):
+        # Se relee el archivo para no pisar otros backfills guardados mientras tanto
+        data = read_json(self.path, {})
+        data[self.key] = self.entry
+        write_json(self.path, data)
+
+    def reset(self):
+        self.entry['chunks'] = {}
+        self.save()
+
+async def backfill(report, chunks, state, sessions, batch_size=BACKFILL_BATCH, retry_uncertain=False):
+    """
+    Exportar los trozos pendientes en lotes, como mucho `sessions` a la vez
+    retry_uncertain repite también los trozos 'uncertain' (forzando el registro)
+    """
+    from beyondup_engine import ReportEngine
+    from beyondup_ledger import export_key, last_export
+
+    skip = {'done'} if retry_uncertain else {'done', 'uncertain'}
+    pending = [c for c in chunks if state.status(c[2]) not in skip]
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    print(f"📦 {len(pending)} trozos pendientes en {len(batches)} lotes ({sessions} a la vez)")
+
+    async def run_batch(batch):
+        done = set()
+
+        def on_range(chunk):
+            done.add(chunk[2])
+            state.mark(chunk, 'done')
+
+        result = await engine.run_job(report, ranges=batch, on_range=on_range, force=retry_uncertain)
+        for chunk in batch:
+            if chunk[2] in done:
+                continue
+            # Exportación directa o trozo omitido por el registro: manda su último estado
+            row = last_export(export_key(report, chunk))
+            status = row['status'] if row else None
+            if status == 'confirmed':
+                state.mark(chunk, 'done')
+            elif status == 'confirm_sent':
+                state.mark(chunk, 'uncertain', "Falló tras pulsar Aceptar: comprobar si llegó el correo")
+            elif status == 'running':
+                state.mark(chunk, 'failed', "Otra ejecución lo estaba exportando; se reintentará")
+            else:
+                state.mark(chunk, 'failed', result['error'] or "Sin exportar")
+
+    try:
+        engine = await ReportEngine(sessions).start()
+    except Exception as e:
+        print(f"   ❌ Login fallido: {str(e)}")
+        return
+    try:
+        await asyncio.gather(*(run_batch(batch) for batch in batches))
+    finally:
+        await engine.stop()
+
+def print_status(chunks, state):
+    counts = {}
+    for _, _, label in chunks:
+        status = state.status(label)
+        counts[status] = counts.get(status, 0) + 1
+        if status == 'failed':
+            print(f"   ❌ {label}: {state.entry['chunks'][label]['error']}")
+        elif status == 'uncertain':
+            print(f"   ⚠️  {label}: {state.entry['chunks'][label]['error']} (--retry-uncertain para repetirlo)")
+    print(f"\n📊 {len(chunks)} trozos: " + ', '.join(f"{n} {s}" for s, n in sorted(counts.items())))
+    return counts.get('done', 0) == len(chunks)
+
+def main():
+    from beyondup_reports import REPORTS
+
+    parser = argparse.ArgumentParser(description="Backfill histórico de Tareas Cerradas en trozos reanudables")
+    parser.add_argument('--start', required=True, help="Fecha inicial dd/mm/aaaa")
+    parser.add_argument('--end', help="Fecha final dd/mm/aaaa (por defecto, el final del último trozo cerrado)")
+    parser.add_argument('--chunk', choices=list(CHUNK_MONTHS), default='quarter', help="Tamaño de cada trozo")
+    parser.add_argument('--report', default='tareas_cerradas_q0', help="Reporte con filtro de fechas a usar")
+    parser.add_argument('--sessions', type=int, default=MAX_CONCURRENCY, help="Páginas simultáneas como máximo")
+    parser.add_argument('--batch', type=int, default=BACKFILL_BATCH, help="Trozos por trabajo")
+    parser.add_argument('--status', action='store_true', help="Mostrar el estado sin exportar")
+    parser.add_argument('--reset', action='store_true', help="Olvidar el progreso y empezar de cero")
+    parser.add_argument('--retry-uncertain', action='store_true',
+                        help="Repetir los trozos que fallaron tras confirmar (puede duplicar correos)")
+    args = parser.parse_args()
+
+    try:
+        start = datetime.strptime(args.start, '%d/%m/%Y')
+        # Sin --end solo períodos cerrados: un trozo recortado a hoy cambiaría de
+        # etiqueta cada día y se volvería a exportar en cada ejecución
+        end = datetime.strptime(args.end, '%d/%m/%Y') if args.end else last_closed_day(datetime.now(), args.chunk)
+    except ValueError as e:
+        parser.error(str(e))
+    if end < start:
+        parser.error("--end es anterior a --start" if args.end else
+                     f"no hay ningún {args.chunk} cerrado desde {args.start}")
+    if args.report not in REPORTS or not REPORTS[args.report]['dates']:
+        parser.error(f"{args.report} no es un reporte con filtro de fechas")
+
+    chunks = split_range(start, end, args.chunk)
+    state = BackfillState(args.report, args.chunk)
+    if args.reset:
+        state.reset()
+
+    print("=" * 70)
+    print(f"🚀 BACKFILL {args.report}: {start:%d/%m/%Y} al {end:%d/%m/%Y} por {args.chunk}")
+    print("=" * 70)
+    if not args.status:
+        check_credentials()
+        asyncio.run(backfill(args.report, chunks, state, max(1, args.sessions), max(1, args.batch),
+                             args.retry_uncertain))
+    print(f"💾 Estado: {BACKFILL_STATE_FILE} ({state.key})")
+    return print_status(chunks, state)
+
+if __name__ == "__main__":
+    try:
+        sys.exit(0 if main() else 1)
+    except KeyboardInterrupt:
+        print("\n\n⏸️  Proceso interrumpido por el usuario (se reanudará en la siguiente ejecución)")
+        sys.exit(130)
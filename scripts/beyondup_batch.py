@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Ejecución por lotes de los reportes del CRM BeyondUp
+Lanza Chromium una sola vez, inicia sesión una sola vez y ejecuta
+cualquier subconjunto de reportes en la misma sesión, varios a la vez
+
+Uso:
+    python3 beyondup_batch.py                      # todos los reportes
+    python3 beyondup_batch.py tareas_actuales tareas_cerradas_q0
+    python3 beyondup_batch.py --concurrency 4
+    python3 beyondup_batch.py --list
+    python3 beyondup_batch.py tareas_cerradas_q0 --quarters=0,-1,-2,-3
+    python3 beyondup_batch.py tareas_cerradas_q0 --range 01/01/2024:30/06/2024
+"""
+
+from datetime import datetime
+import argparse
+import asyncio
+import sys
+
+from beyondup_common import (
+    USERNAME, URL, HEADLESS, SCREENSHOTS_DIR, MAX_CONCURRENCY, check_credentials
+)
+from beyondup_engine import REPORTS, run_reports
+from beyondup_flow import resolve_ranges
+from beyondup_aimd import ADAPTIVE_CONCURRENCY, AIMD_MIN_CONCURRENCY
+
+def print_summary(results):
+    """Mostrar el resultado de cada reporte"""
+    print("\n" + "=" * 70)
+    print("📊 RESUMEN DEL LOTE")
+    print("=" * 70)
+    for name, result in results.items():
+        status = "✅" if result['ok'] else "❌"
+        print(f"   {status} {name:<28} {result['seconds']:>7.1f}s")
+        if result['error']:
+            print(f"      💥 {result['error']}")
+
+    completed = sum(1 for r in results.values() if r['ok'])
+    print(f"\n   {completed}/{len(results)} reportes completados")
+    print(f"📸 Screenshots: {SCREENSHOTS_DIR}\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecuta varios reportes BeyondUp en un único navegador")
+    parser.add_argument('reports', nargs='*', metavar='REPORTE',
+                        help="Reportes a ejecutar (por defecto, todos)")
+    parser.add_argument('--list', action='store_true', help="Listar los reportes disponibles")
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENCY,
+                        help=f"Reportes simultáneos (por defecto {MAX_CONCURRENCY})")
+    parser.add_argument('--quarters', default='',
+                        help="Trimestres a exportar desde una sola vista, p. ej. --quarters=0,-1,-2 (reportes con fechas)")
+    parser.add_argument('--range', action='append', default=[], metavar='INICIO:FIN',
+                        help="Rango dd/mm/aaaa:dd/mm/aaaa a exportar (se puede repetir)")
+    parser.add_argument('--force', action='store_true',
+                        help="Exportar aunque el registro indique que ya se hizo hace poco")
+    args = parser.parse_args()
+
+    if args.list:
+        for name in REPORTS:
+            print(name)
+        return True
+
+    unknown = [name for name in args.reports if name not in REPORTS]
+    if unknown:
+        parser.error(f"reportes desconocidos: {', '.join(unknown)} (usa --list)")
+
+    try:
+        ranges = resolve_ranges([q for q in args.quarters.split(',') if q.strip()], args.range) or None
+    except ValueError as e:
+        parser.error(str(e))
+
+    check_credentials()
+    names = list(dict.fromkeys(args.reports)) or list(REPORTS)
+    if ranges:
+        undated = [name for name in names if not REPORTS[name]['dates']]
+        if undated:
+            parser.error(f"--quarters/--range solo valen para reportes con fechas: {', '.join(undated)}")
+
+    print("=" * 70)
+    print("🚀 AUTOMATIZACIÓN CRM BEYONDUP - EJECUCIÓN POR LOTES")
+    print("=" * 70)
+    print(f"\n📅 Fecha: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+    print(f"👤 Usuario: {USERNAME}")
+    print(f"🌐 URL: {URL}")
+    print(f"👁️  Modo: {'Headless' if HEADLESS else 'Visible'}")
+    print(f"📋 Reportes: {', '.join(names)}")
+    print(f"🔀 Concurrencia: {args.concurrency}"
+          + (f" (máximo; AIMD baja hasta {AIMD_MIN_CONCURRENCY} si el CRM se degrada)" if ADAPTIVE_CONCURRENCY else ""))
+    if ranges:
+        print(f"📅 Períodos: {', '.join(label for _, _, label in ranges)}")
+
+    results = asyncio.run(run_reports(names, args.concurrency, ranges, args.force))
+    print_summary(results)
+    return all(r['ok'] for r in results.values())
+
+if __name__ == "__main__":
+    try:
+        success = main()
+        sys.exit(0 if success else 1)
+    except KeyboardInterrupt:
+        print("\n\n⏸️  Proceso interrumpido por el usuario")
+        sys.exit(130)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los reportes contra el CRM simulado (beyondup_mock.py)
+Ejecuta cada reporte N veces con un navegador y mide tiempo total, tiempo
+por paso, memoria (RSS) y CPU del navegador. Los resultados se guardan en
+JSON y pueden compararse con una línea base para detectar regresiones.
+
+Uso:
+    python3 beyondup_bench.py --runs 5 --save benchmarks/baseline.json
+    python3 beyondup_bench.py --runs 5 --compare benchmarks/baseline.json --threshold 0.2
+    python3 beyondup_bench.py tareas_cerradas_q0 --latency 500 --overlay 800
+"""
+
+from datetime import datetime
+from pathlib import Path
+import statistics
+import argparse
+import tempfile
+import asyncio
+import socket
+import json
+import time
+import sys
+import os
+
+# Métricas comparadas con la línea base (mayor es peor)
+COMPARED = ('wall_s', 'rss_mb', 'cpu_s')
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+_CLK_TCK = os.sysconf('SC_CLK_TCK')
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _children():
+    """Mapa pid -> pid padre de todos los procesos visibles en /proc"""
+    parents = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            parents[int(entry)] = int(fields[1])
+        except (OSError, IndexError, ValueError):
+            continue
+    return parents
+
+def browser_usage():
+    """
+    (RSS en MB, CPU en s) de los procesos hijos de este proceso
+    (driver de Playwright y Chromium); solo Linux
+    """
+    parents = _children()
+    tree, pending = set(), [os.getpid()]
+    while pending:
+        pid = pending.pop()
+        for child, parent in parents.items():
+            if parent == pid and child not in tree:
+                tree.add(child)
+                pending.append(child)
+
+    rss = cpu = 0
+    for pid in tree:
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                rss += int(f.read().split()[1]) * _PAGE_SIZE
+            with open(f'/proc/{pid}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            # utime, stime, cutime, cstime
+            cpu += sum(int(v) for v in fields[11:15]) / _CLK_TCK
+        except (OSError, IndexError, ValueError):
+            continue
+    return rss / 1048576, cpu
+
+async def _sample_peak(peak, interval=0.25):
+    """Muestrear el RSS del navegador durante un trabajo y guardar el máximo"""
+    while True:
+        peak[0] = max(peak[0], (await asyncio.to_thread(browser_usage))[0])
+        await asyncio.sleep(interval)
+
+def _summary(values):
+    values = sorted(values)
+    if not values:
+        return None
+    return {
+        'median': round(statistics.median(values), 3),
+        'p90': round(values[min(len(values) - 1, int(len(values) * 0.9))], 3),
+        'min': round(values[0], 3),
+        'max': round(values[-1], 3),
+    }
+
+async def bench(names, runs, concurrency=1):
+    """Ejecutar cada reporte `runs` veces y devolver las mediciones por reporte"""
+    from beyondup_engine import ReportEngine
+
+    results = {name: [] for name in names}
+    # Concurrencia fija: las mediciones deben ser comparables entre ejecuciones
+    async with ReportEngine(concurrency, adaptive=False) as engine:
+        for name in names:
+            for i in range(runs):
+                print(f"\n⏱️  {name} ({i + 1}/{runs})")
+                peak = [0.0]
+                sampler = asyncio.create_task(_sample_peak(peak))
+                _, cpu_before = browser_usage()
+                start = time.monotonic()
+                # Cada ejecución exporta de verdad aunque la anterior ya quedara registrada
+                result = await engine.run_job(name, force=True)
+                wall = time.monotonic() - start
+                sampler.cancel()
+                rss, cpu_after = browser_usage()
+
+                steps = {}
+                for record in result.get('steps', []):
+                    # Pasos repetidos (p. ej. dos filtros) se suman
+                    steps[record['step']] = round(steps.get(record['step'], 0) + record['duration_s'], 3)
+                results[name].append({
+                    'ok': result['ok'],
+                    'error': result['error'],
+                    'wall_s': round(wall, 3),
+                    'rss_mb': round(max(peak[0], rss), 1),
+                    'cpu_s': round(cpu_after - cpu_before, 3),
+                    'steps': steps,
+                })
+    return results
+
+def aggregate(results):
+    """Resumen por reporte: mediana/p90/min/max de cada métrica y de cada paso"""
+    report = {}
+    for name, runs in results.items():
+        ok_runs = [r for r in runs if r['ok']]
+        steps = {}
+        for run in ok_runs:
+            for step, seconds in run['steps'].items():
+                steps.setdefault(step, []).append(seconds)
+        report[name] = {
+            'runs': len(runs),
+            'ok': len(ok_runs),
+            **{metric: _summary([r[metric] for r in ok_runs]) for metric in COMPARED},
+            'steps': {step: _summary(values) for step, values in steps.items()},
+        }
+    return report
+
+def compare(current, baseline, threshold):
+    """Lista de regresiones: métricas (y pasos) cuya mediana supera la base en más de threshold"""
+    regressions = []
+
+    def check(label, now, base):
+        if now and base and base['median'] > 0 and now['median'] > base['median'] * (1 + threshold):
+            regressions.append(f"{label}: {base['median']} -> {now['median']} "
+                               f"(+{(now['median'] / base['median'] - 1) * 100:.0f}%)")
+
+    for name, stats in current['reports'].items():
+        base = baseline['reports'].get(name)
+        if not base:
+            continue
+        if stats['ok'] < stats['runs']:
+            regressions.append(f"{name}: {stats['runs'] - stats['ok']} ejecuciones fallidas")
+        for metric in COMPARED:
+            check(f"{name} {metric}", stats[metric], base[metric])
+        for step, values in stats['steps'].items():
+            check(f"{name} paso {step}", values, base['steps'].get(step))
+    return regressions
+
+def print_report(report):
+    print("\n" + "=" * 70)
+    print("⏱️  RESULTADOS (mediana)")
+    print("=" * 70)
+    for name, stats in report['reports'].items():
+        if not stats['wall_s']:
+            print(f"   ❌ {name}: sin ejecuciones correctas")
+            continue
+        print(f"   {name}: {stats['wall_s']['median']}s, RSS {stats['rss_mb']['median']} MB, "
+              f"CPU {stats['cpu_s']['median']}s ({stats['ok']}/{stats['runs']} ok)")
+        for step, values in stats['steps'].items():
+            print(f"      · {step}: {values['median']}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de reportes BeyondUp contra el CRM simulado")
+    parser.add_argument('reports', nargs='*', help="Reportes a medir (por defecto todos)")
+    parser.add_argument('--runs', type=int, default=3, help="Ejecuciones por reporte")
+    parser.add_argument('--latency', type=int, default=200, help="Latencia del CRM simulado (ms)")
+    parser.add_argument('--overlay', type=int, default=300, help="Overlay tras cada ajax (ms)")
+    parser.add_argument('--save', type=Path, help="Guardar los resultados como JSON")
+    parser.add_argument('--compare', type=Path, help="Línea base JSON con la que comparar")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Regresión si la mediana supera la base en esta fracción")
+    args = parser.parse_args()
+
+    # El CRM simulado y el estado de cada benchmark deben fijarse antes de
+    # importar los módulos que leen la configuración del entorno
+    from beyondup_mock import start_mock
+    port = _free_port()
+    server, crm = start_mock(port=port, latency_ms=args.latency, overlay_ms=args.overlay)
+    state = Path(tempfile.mkdtemp(prefix='beyondup_bench_'))
+    os.environ.update({
+        'BEYONDUP_URL': f'http://127.0.0.1:{port}/',
+        'BEYONDUP_USER': 'bench',
+        'BEYONDUP_PASS': 'bench',
+        'SESSION_FILE': str(state / 'session.json'),
+        'NAV_CACHE_FILE': str(state / 'nav_cache.json'),
+        'SELECTOR_CACHE_FILE': str(state / 'selector_cache.json'),
+        'DIRECT_RECIPES_FILE': str(state / 'direct_recipes.json'),
+        # Registro propio: el de producción omitiría las ejecuciones repetidas
+        'LEDGER_FILE': str(state / 'ledger.sqlite3'),
+        # Latencias del CRM simulado: ni se mezclan con las aprendidas ni cortan pasos
+        'TIMEOUT_STATS_FILE': str(state / 'timeout_stats.json'),
+        'ADAPTIVE_TIMEOUTS': 'false',
+        'SCREENSHOTS_DIR': str(state / 'screenshots'),
+        'LOGS_DIR': str(state / 'logs'),
+    })
+    os.environ.setdefault('ROUTE_PROFILE', 'measure')
+
+    from beyondup_engine import REPORTS
+    names = args.reports or list(REPORTS)
+    unknown = [n for n in names if n not in REPORTS]
+    if unknown:
+        parser.error(f"Reportes desconocidos: {', '.join(unknown)}")
+
+    print(f"🧪 CRM simulado en http://127.0.0.1:{port} (latencia {args.latency} ms, overlay {args.overlay} ms)")
+    try:
+        results = asyncio.run(bench(names, args.runs))
+    finally:
+        server.shutdown()
+
+    report = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'runs': args.runs,
+            'latency_ms': args.latency,
+            'overlay_ms': args.overlay,
+            'exports': len(crm.exports),
+        },
+        'reports': aggregate(results),
+        'raw': results,
+    }
+    print_report(report)
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+        print(f"\n💾 Resultados guardados en {args.save}")
+
+    ok = all(stats['ok'] == stats['runs'] for stats in report['reports'].values())
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regresiones (umbral {args.threshold * 100:.0f}%):")
+            for line in regressions:
+                print(f"   - {line}")
+            return False
+        print(f"\n✅ Sin regresiones respecto a {args.compare}")
+    return ok
+
+if __name__ == "__main__":
+    try:
+        sys.exit(0 if main() else 1)
+    except KeyboardInterrupt:
+        print("\n\n⏸️  Proceso interrumpido por el usuario")
+        sys.exit(130)
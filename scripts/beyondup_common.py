@@ -0,0 +1,173 @@
+"""
+Utilidades compartidas por los scripts de automatización del CRM BeyondUp
+Configuración desde variables de entorno, arranque del navegador y login
+"""
+
+from datetime import datetime
+from pathlib import Path
+import contextvars
+import asyncio
+import json
+import os
+import sys
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+from beyondup_waits import wait_for_ajax
+from beyondup_routing import apply_route_profile, close_step
+from beyondup_screenshots import should_capture, capture, extension as screenshot_extension
+import beyondup_artifacts as artifacts
+from beyondup_metrics import step, note_retry
+
+# Configuración desde variables de entorno
+USERNAME = os.getenv('BEYONDUP_USER')
+PASSWORD = os.getenv('BEYONDUP_PASS')
+URL = os.getenv('BEYONDUP_URL', 'https://login.beyondup.es')
+HEADLESS = os.getenv('HEADLESS', 'true').lower() == 'true'
+TIMEOUT = int(os.getenv('TIMEOUT', '60000'))
+MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))
+MAX_CONCURRENCY = int(os.getenv('MAX_CONCURRENCY', '3'))
+SCREENSHOTS_DIR = Path(os.getenv('SCREENSHOTS_DIR', '/tmp/beyondup_screenshots'))
+SESSION_FILE = Path(os.getenv('SESSION_FILE', '/tmp/beyondup_session.json'))
+DAEMON_HOST = os.getenv('DAEMON_HOST', '127.0.0.1')
+DAEMON_PORT = int(os.getenv('DAEMON_PORT', '8080'))
+
+LOGIN_FORM_SELECTOR = 'input[name="formularioLogin:username"]'
+
+BROWSER_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--no-sandbox',
+    '--disable-dev-shm-usage'
+]
+
+# Crear directorio para screenshots si no existe
+SCREENSHOTS_DIR.mkdir(parents=True, exist_ok=True)
+
+# Trabajo en curso (lo fija el motor asíncrono por tarea) para que los
+# screenshots de trabajos concurrentes no se pisen entre sí
+CURRENT_JOB = contextvars.ContextVar('current_job', default=None)
+
+def check_credentials():
+    """Validar credenciales; termina el proceso si no están configuradas"""
+    if not USERNAME or not PASSWORD:
+        print("❌ ERROR: Credenciales no configuradas")
+        print("   Configura las variables de entorno:")
+        print("   - BEYONDUP_USER")
+        print("   - BEYONDUP_PASS")
+        print("\n   O crea un archivo .env basado en .env.example")
+        sys.exit(1)
+
+def artifact_path(name, ext):
+    """Ruta de un artefacto del trabajo en curso: {timestamp}[_{trabajo}]_{name}.{ext}"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    job = CURRENT_JOB.get()
+    prefix = f"{timestamp}_{job}" if job else timestamp
+    return SCREENSHOTS_DIR / f"{prefix}_{name}.{ext}"
+
+async def save_screenshot(page, name, level='step'):
+    """
+    Guardar screenshot con timestamp (cierra el paso en las estadísticas de red)
+    level: 'error', 'key' o 'step'; SCREENSHOT_LEVEL decide cuáles se guardan
+    Si la página tiene buffer de artefactos, la captura queda en memoria y
+    solo se escribe a disco con la primera captura de error
+    """
+    close_step(page, name)
+    if not should_capture(level):
+        return None
+    filepath = artifact_path(name, screenshot_extension())
+    if not artifacts.is_buffered(page):
+        await capture(page, filepath)
+        print(f"   📸 Screenshot: {filepath.name}")
+        return filepath
+
+    await artifacts.record(page, filepath)
+    if level == 'error':
+        await flush_artifacts(page)
+    return filepath
+
+async def flush_artifacts(page):
+    """Escribir a disco las capturas, DOM y consola bufferizados de la página"""
+    written = await artifacts.flush(page, artifact_path('console', 'log'))
+    if written:
+        print(f"   📸 {written} artefactos del buffer guardados en {SCREENSHOTS_DIR}")
+    return written
+
+async def retry_operation(operation, max_attempts=MAX_RETRIES, delay=2):
+    """Reintentar una operación asíncrona con backoff exponencial"""
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return await operation()
+        except Exception as e:
+            if attempt == max_attempts:
+                raise
+
+            note_retry()
+            wait_time = delay * (2 ** (attempt - 1))
+            print(f"   ⚠️  Intento {attempt}/{max_attempts} falló. Reintentando en {wait_time}s...")
+            await asyncio.sleep(wait_time)
+
+def read_json(path, default=None):
+    """Leer un archivo JSON de estado; devuelve default si no existe o está corrupto"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def write_json(path, data, mode=0o644):
+    """Escribir un archivo JSON de forma atómica (archivo temporal + rename)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + f'.{os.getpid()}.tmp')
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+async def launch_browser(p):
+    """Lanzar Chromium con los argumentos comunes"""
+    with step('launch'):
+        return await p.chromium.launch(headless=HEADLESS, args=BROWSER_ARGS)
+
+async def new_context(browser, storage_state=None):
+    """Crear un contexto de navegador con la configuración común"""
+    return await browser.new_context(
+        viewport={'width': 1920, 'height': 1080},
+        user_agent='Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36',
+        ignore_https_errors=True,
+        bypass_csp=True,
+        storage_state=storage_state
+    )
+
+async def new_page(context):
+    """Abrir una página nueva con el timeout por defecto, el perfil de red y el buffer de artefactos"""
+    page = await context.new_page()
+    page.set_default_timeout(TIMEOUT)
+    await apply_route_profile(page)
+    artifacts.attach(page)
+    return page
+
+async def login(page):
+    """
+    Iniciar sesión en BeyondUp
+    Devuelve la URL de inicio tras el login, para abrir más páginas
+    en el mismo contexto sin volver a autenticarse
+    """
+    await page.goto(URL)
+    await wait_for_ajax(page, fallback=2)
+    await save_screenshot(page, "01_login_page")
+
+    print("   🔐 Ingresando credenciales...")
+    await page.fill(LOGIN_FORM_SELECTOR, USERNAME)
+    await page.fill('input[name="formularioLogin:password"]', PASSWORD)
+    await save_screenshot(page, "02_credentials_filled")
+
+    print("   👆 Haciendo clic en login...")
+    await page.click('button[type="submit"]')
+    await page.wait_for_load_state('networkidle')
+    await save_screenshot(page, "03_after_login", level='key')
+    return page.url
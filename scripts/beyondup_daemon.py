@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Demonio de trabajos del CRM BeyondUp
+Proceso residente que mantiene un navegador caliente con la sesión
+iniciada y acepta trabajos por una API HTTP local:
+
+    GET  /health           estado del demonio y del navegador
+    GET  /reports          reportes disponibles
+    POST /jobs             {"report": "tareas_futuras"} -> 202 {"id": ...}
+                           {"report": "tareas_cerradas_q0", "quarters": [0, -1], "ranges": ["01/01/2024:30/06/2024"]}
+                           {"report": "tareas_futuras", "force": true}  (aunque ya se exportara)
+    GET  /jobs             últimos trabajos
+    GET  /jobs/<id>        estado y resultado de un trabajo
+    GET  /schedule         entradas del planificador (SCHEDULE_FILE)
+
+Uso:
+    python3 beyondup_daemon.py serve
+    python3 beyondup_daemon.py submit tareas_futuras [--wait] [--force]
+    python3 beyondup_daemon.py submit tareas_cerradas_q0 --quarters=0,-1 --range 01/01/2024:30/06/2024
+    python3 beyondup_daemon.py status <id>
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from datetime import datetime
+import urllib.request
+import urllib.error
+import argparse
+import asyncio
+import threading
+import signal
+import json
+import uuid
+import time
+import sys
+
+from beyondup_common import DAEMON_HOST, DAEMON_PORT, MAX_CONCURRENCY
+from beyondup_scheduler import Scheduler, load_schedule
+from beyondup_guard import guard
+
+# Trabajos terminados que se conservan en memoria para consultar su resultado
+MAX_FINISHED_JOBS = 500
+
+class JobManager:
+    """Cola de trabajos sobre un ReportEngine; solo se usa desde el bucle de eventos"""
+
+    def __init__(self, concurrency=MAX_CONCURRENCY):
+        self.concurrency = concurrency
+        self.engine = None
+        self.scheduler = None
+        self.jobs = {}
+        self._tasks = set()
+        self._engine_lock = asyncio.Lock()
+
+    async def ensure_engine(self):
+        """Arrancar (o rearrancar si el navegador murió) el motor compartido"""
+        from beyondup_engine import ReportEngine
+
+        async with self._engine_lock:
+            if self.engine and self.engine.is_running():
+                return self.engine
+            if self.engine:
+                print("   ⚠️  Navegador desconectado, relanzando...")
+                try:
+                    await self.engine.stop()
+                except Exception:
+                    pass
+            print("🌐 Lanzando navegador e iniciando sesión...")
+            self.engine = await ReportEngine(self.concurrency).start()
+            print("   ✅ Navegador listo")
+            return self.engine
+
+    async def submit(self, report, ranges=None, source='api', force=False):
+        """Registrar un trabajo y lanzarlo en segundo plano"""
+        job = {
+            'id': uuid.uuid4().hex[:12],
+            'report': report,
+            'source': source,
+            'ranges': [label for _, _, label in ranges or []],
+            'status': 'queued',
+            'submitted_at': datetime.now().isoformat(timespec='seconds'),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+        }
+        self.jobs[job['id']] = job
+        task = asyncio.create_task(self._run(job, ranges, force))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self._prune()
+        return dict(job)
+
+    async def _run(self, job, ranges=None, force=False):
+        def mark_running():
+            job['status'] = 'running'
+            job['started_at'] = datetime.now().isoformat(timespec='seconds')
+
+        try:
+            engine = await self.ensure_engine()
+            result = await engine.run_job(job['report'], on_start=mark_running, ranges=ranges,
+                                          force=force)
+        except Exception as e:
+            result = {'ok': False, 'seconds': 0.0, 'error': str(e)}
+
+        job['result'] = result
+        job['status'] = 'done' if result['ok'] else 'failed'
+        job['finished_at'] = datetime.now().isoformat(timespec='seconds')
+
+    def _prune(self):
+        """Olvidar los trabajos terminados más antiguos"""
+        finished = [j['id'] for j in self.jobs.values() if j['finished_at']]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    async def get(self, job_id):
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def list(self):
+        return [dict(job) for job in self.jobs.values()]
+
+    async def health(self):
+        running = sum(1 for j in self.jobs.values() if j['status'] == 'running')
+        queued = sum(1 for j in self.jobs.values() if j['status'] == 'queued')
+        return {
+            'status': 'ok',
+            'browser': bool(self.engine and self.engine.is_running()),
+            'concurrency': self.engine.capacity() if self.engine else self.concurrency,
+            'aimd': self.engine.concurrency_status() if self.engine else None,
+            'running': running,
+            'queued': queued,
+            'scheduled': len(self.scheduler.entries) if self.scheduler else 0,
+            'crm': guard().status(),
+        }
+
+    async def schedule(self):
+        return self.scheduler.status() if self.scheduler else {}
+
+    async def shutdown(self):
+        if self.engine:
+            await self.engine.stop()
+
+def make_handler(manager, loop):
+    """Handler HTTP que delega cada petición en el bucle de eventos del demonio"""
+    from beyondup_engine import REPORTS
+    from beyondup_flow import resolve_ranges
+
+    def call(coro):
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout=10)
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.rstrip('/')
+            if path == '/health':
+                self._send(200, call(manager.health()))
+            elif path == '/reports':
+                self._send(200, list(REPORTS))
+            elif path == '/jobs':
+                self._send(200, call(manager.list()))
+            elif path == '/schedule':
+                self._send(200, call(manager.schedule()))
+            elif path.startswith('/jobs/'):
+                job = call(manager.get(path.split('/', 2)[2]))
+                if job:
+                    self._send(200, job)
+                else:
+                    self._send(404, {'error': 'Trabajo no encontrado'})
+            else:
+                self._send(404, {'error': 'Ruta no encontrada'})
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/jobs':
+                return self._send(404, {'error': 'Ruta no encontrada'})
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                payload = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                return self._send(400, {'error': 'JSON no válido'})
+
+            report = payload.get('report')
+            if report not in REPORTS:
+                return self._send(400, {'error': f"Reporte desconocido: {report}", 'reports': list(REPORTS)})
+            try:
+                ranges = resolve_ranges(payload.get('quarters') or [], payload.get('ranges') or []) or None
+            except (TypeError, ValueError) as e:
+                return self._send(400, {'error': f"Fechas no válidas: {e}"})
+            if ranges and not REPORTS[report]['dates']:
+                return self._send(400, {'error': f"El reporte {report} no filtra por fechas"})
+            self._send(202, call(manager.submit(report, ranges, force=bool(payload.get('force')))))
+
+        def log_message(self, format, *args):
+            print(f"   🌐 {self.address_string()} {format % args}")
+
+    return Handler
+
+async def serve(host=DAEMON_HOST, port=DAEMON_PORT, concurrency=MAX_CONCURRENCY):
+    """Arrancar el navegador caliente y la API HTTP hasta recibir SIGTERM/SIGINT"""
+    loop = asyncio.get_running_loop()
+    manager = JobManager(concurrency)
+
+    try:
+        await manager.ensure_engine()
+    except Exception as e:
+        # El CRM puede no estar disponible al arrancar: se reintenta con el primer trabajo
+        print(f"   ⚠️  No se pudo preparar el navegador: {str(e)}")
+
+    entries = load_schedule()
+    scheduler_task = None
+    if entries:
+        manager.scheduler = Scheduler(manager, entries)
+        scheduler_task = asyncio.create_task(manager.scheduler.run())
+
+    server = ThreadingHTTPServer((host, port), make_handler(manager, loop))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🚀 Demonio BeyondUp escuchando en http://{host}:{port}")
+
+    stop = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    print("\n⏹️  Deteniendo demonio...")
+    if scheduler_task:
+        scheduler_task.cancel()
+    server.shutdown()
+    await manager.shutdown()
+
+def request(method, path, payload=None):
+    """Llamar a la API del demonio desde la línea de comandos"""
+    host = '127.0.0.1' if DAEMON_HOST == '0.0.0.0' else DAEMON_HOST
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(f"http://{host}:{DAEMON_PORT}{path}", data=data, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read())
+
+def main():
+    parser = argparse.ArgumentParser(description="Demonio de trabajos BeyondUp")
+    sub = parser.add_subparsers(dest='command', required=True)
+    serve_parser = sub.add_parser('serve', help="Arrancar el demonio")
+    serve_parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENCY)
+    submit_parser = sub.add_parser('submit', help="Enviar un trabajo al demonio")
+    submit_parser.add_argument('report')
+    submit_parser.add_argument('--wait', action='store_true', help="Esperar a que termine")
+    submit_parser.add_argument('--quarters', default='',
+                               help="Trimestres a exportar desde una sola vista, p. ej. --quarters=0,-1,-2 (reportes con fechas)")
+    submit_parser.add_argument('--range', action='append', default=[], metavar='INICIO:FIN',
+                               help="Rango dd/mm/aaaa:dd/mm/aaaa a exportar (se puede repetir)")
+    submit_parser.add_argument('--force', action='store_true',
+                               help="Exportar aunque el registro indique que ya se hizo hace poco")
+    status_parser = sub.add_parser('status', help="Consultar un trabajo (o todos)")
+    status_parser.add_argument('job_id', nargs='?')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        from beyondup_common import check_credentials
+        check_credentials()
+        asyncio.run(serve(concurrency=args.concurrency))
+        return True
+
+    if args.command == 'status':
+        print(json.dumps(request('GET', f"/jobs/{args.job_id}" if args.job_id else '/jobs'),
+                         ensure_ascii=False, indent=2))
+        return True
+
+    payload = {'report': args.report}
+    try:
+        quarters = [int(q) for q in args.quarters.split(',') if q.strip()]
+    except ValueError:
+        submit_parser.error(f"--quarters no válido: {args.quarters}")
+    if quarters:
+        payload['quarters'] = quarters
+    if args.range:
+        payload['ranges'] = args.range
+    if args.force:
+        payload['force'] = True
+    job = request('POST', '/jobs', payload)
+    if 'id' not in job:
+        print(f"❌ {job.get('error')}")
+        return False
+    print(f"📨 Trabajo {job['id']} ({job['report']}) en cola")
+    if not args.wait:
+        return True
+
+    while job['status'] in ('queued', 'running'):
+        time.sleep(2)
+        job = request('GET', f"/jobs/{job['id']}")
+    print(json.dumps(job, ensure_ascii=False, indent=2))
+    return job['status'] == 'done'
+
+if __name__ == "__main__":
+    try:
+        sys.exit(0 if main() else 1)
+    except KeyboardInterrupt:
+        print("\n\n⏸️  Proceso interrumpido por el usuario")
+        sys.exit(130)
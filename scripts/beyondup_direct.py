@@ -0,0 +1,321 @@
+"""
+Exportación directa por HTTP, sin navegador
+La primera vez cada reporte se ejecuta en el navegador y se graban los POST
+JSF/PrimeFaces que lanza (filtros, botón Excel, Aceptar), junto con la URL de
+la vista. Las siguientes ejecuciones repiten esos POST con un cliente HTTP
+keep-alive y las cookies de la sesión: unas pocas peticiones por reporte en
+lugar de una página de Chromium.
+
+El ViewState se toma de la vista al empezar y se actualiza con cada
+respuesta; si el servidor lo da por caducado se vuelve a pedir la vista y
+se repite la secuencia. Si la sesión caducó o algo falla antes del POST de
+exportación, el motor vuelve al flujo del navegador (que regraba la receta).
+Si falla el POST de Aceptar (marcado al grabar) o uno posterior no se
+reintenta, para no enviar el correo dos veces.
+
+    DIRECT_EXPORT=true          activar el modo directo
+    DIRECT_RECIPES_FILE=...     recetas grabadas por reporte
+"""
+
+from urllib.parse import urlsplit, urlencode, parse_qsl, urljoin
+from datetime import datetime
+from pathlib import Path
+import http.client
+import threading
+import asyncio
+import html
+import ssl
+import os
+import re
+
+from beyondup_common import LOGIN_FORM_SELECTOR, read_json, write_json
+
+DIRECT_EXPORT = os.getenv('DIRECT_EXPORT', 'false').lower() == 'true'
+DIRECT_RECIPES_FILE = Path(os.getenv('DIRECT_RECIPES_FILE', '/tmp/beyondup_direct_recipes.json'))
+DIRECT_TIMEOUT = int(os.getenv('DIRECT_TIMEOUT', '60'))
+
+VIEWSTATE = 'javax.faces.ViewState'
+
+# Cabeceras de las peticiones grabadas que se repiten tal cual
+_REPLAYED_HEADERS = ('content-type', 'faces-request', 'x-requested-with', 'accept')
+
+_PARTIAL_VIEWSTATE_RE = re.compile(r'<update id="[^"]*javax\.faces\.ViewState[^"]*"><!\[CDATA\[(.*?)\]\]>', re.S)
+_INPUT_RE = re.compile(r'<input[^>]*name="javax\.faces\.ViewState"[^>]*>', re.I)
+_VALUE_RE = re.compile(r'value="([^"]*)"', re.I)
+_REDIRECT_RE = re.compile(r'<redirect url="([^"]*)"')
+_ERROR_RE = re.compile(r'<error-name>(.*?)</error-name>', re.S)
+_LOGIN_FIELD = LOGIN_FORM_SELECTOR.split('"')[1]
+_LOGIN_FORM = _LOGIN_FIELD.split(':')[0]
+
+class DirectExportError(Exception):
+    """La exportación directa no se pudo completar"""
+
+    def __init__(self, message, exported=False):
+        super().__init__(message)
+        # True si el fallo llegó en el POST de exportación: no hay que repetirla
+        self.exported = exported
+
+class ViewExpired(DirectExportError):
+    pass
+
+class SessionExpired(DirectExportError):
+    pass
+
+_recipes = None
+
+def _load_recipes():
+    global _recipes
+    if _recipes is None:
+        _recipes = read_json(DIRECT_RECIPES_FILE, {})
+    return _recipes
+
+def _is_login_request(url, names):
+    return 'login' in urlsplit(url).path.lower() or any(
+        name == _LOGIN_FORM or name.startswith(_LOGIN_FORM + ':') for name in names)
+
+def get_recipe(report):
+    recipe = _load_recipes().get(report)
+    # Recetas antiguas (sin el POST de exportación marcado o con el de login): se regraban
+    if recipe and ('confirm_index' not in recipe or any(
+            _is_login_request(req['url'], [name for name, _ in req['fields']]) for req in recipe['requests'])):
+        return None
+    return recipe
+
+def save_recipe(report, recipe):
+    _load_recipes()[report] = recipe
+    # URLs y valores de los formularios del CRM: legible solo por el usuario
+    write_json(DIRECT_RECIPES_FILE, _recipes, mode=0o600)
+
+class ExportRecorder:
+    """
+    Graba los POST con ViewState que hace una página durante un reporte
+    Los valores que coinciden con params (p. ej. las fechas del trimestre)
+    se guardan como parámetros para sustituirlos en cada ejecución
+    """
+
+    def __init__(self, page, params=None):
+        self.params = params or {}
+        self.reset()
+        page.on('request', self._on_request)
+
+    def reset(self, complete=True):
+        """Empezar de nuevo (cada intento del flujo); complete=False si el intento no parte de la vista"""
+        self.start_url = None
+        self.requests = []
+        self.confirm_index = None
+        self.complete = complete
+
+    def mark_confirm(self):
+        """Llamar justo antes de pulsar Aceptar: el siguiente POST es el de exportación"""
+        self.confirm_index = len(self.requests)
+
+    def _on_request(self, request):
+        if request.method != 'POST' or not request.post_data:
+            return
+        fields = parse_qsl(request.post_data, keep_blank_values=True)
+        if not any(name == VIEWSTATE for name, _ in fields):
+            return
+        # Nunca grabar el formulario de login (usuario y contraseña)
+        if _is_login_request(request.url, [name for name, _ in fields]):
+            return
+        if self.start_url is None:
+            try:
+                self.start_url = request.frame.url
+            except Exception:
+                self.start_url = request.url
+
+        by_value = {value: name for name, value in self.params.items()}
+        self.requests.append({
+            'url': request.url,
+            'headers': {k: v for k, v in request.headers.items() if k.lower() in _REPLAYED_HEADERS},
+            'fields': [[name, {'param': by_value[value]} if value in by_value else value]
+                       for name, value in fields],
+        })
+
+    def recipe(self):
+        if (not self.complete or not self.start_url or self.confirm_index is None
+                or self.confirm_index >= len(self.requests)):
+            return None
+        return {
+            'start_url': self.start_url,
+            'requests': self.requests,
+            'confirm_index': self.confirm_index,
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        }
+
+class HttpPool:
+    """Conexiones HTTP(S) persistentes por host, reutilizadas entre peticiones"""
+
+    def __init__(self, max_idle=4, timeout=DIRECT_TIMEOUT):
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+        # Igual que los contextos del navegador (ignore_https_errors)
+        self._ssl = ssl._create_unverified_context()
+
+    def _connect(self, scheme, netloc):
+        if scheme == 'https':
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout, context=self._ssl)
+        return http.client.HTTPConnection(netloc, timeout=self.timeout)
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(*key), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, method, url, body=None, headers=None):
+        """Petición bloqueante; devuelve (status, cabeceras, texto)"""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        for attempt in range(2):
+            conn, reused = self._acquire(key)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http.client.HTTPException, ConnectionError, OSError):
+                conn.close()
+                # Una conexión reutilizada puede haberla cerrado el servidor
+                if reused and attempt == 0:
+                    continue
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            charset = resp.headers.get_content_charset() or 'utf-8'
+            return resp.status, resp.headers, data.decode(charset, errors='replace')
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+_pool = HttpPool()
+
+class DirectSession:
+    """Cookies de la sesión del navegador para las peticiones directas"""
+
+    def __init__(self, cookies):
+        self.cookies = {(c['domain'].lstrip('.'), c['name']): c['value'] for c in cookies}
+
+    def header(self, url):
+        host = urlsplit(url).hostname or ''
+        return '; '.join(f"{name}={value}" for (domain, name), value in self.cookies.items()
+                         if host == domain or host.endswith('.' + domain))
+
+    def update(self, url, headers):
+        host = urlsplit(url).hostname or ''
+        for cookie in headers.get_all('Set-Cookie') or []:
+            name, _, rest = cookie.partition('=')
+            self.cookies[(host, name.strip())] = rest.split(';', 1)[0]
+
+def _viewstate(text):
+    match = _PARTIAL_VIEWSTATE_RE.search(text)
+    if match:
+        return match.group(1)
+    tag = _INPUT_RE.search(text)
+    if tag:
+        value = _VALUE_RE.search(tag.group(0))
+        if value:
+            return html.unescape(value.group(1))
+    return None
+
+def _is_login(text):
+    return _LOGIN_FIELD in text
+
+def _fetch(session, method, url, body=None, headers=None):
+    """Petición con cookies de sesión, siguiendo redirecciones"""
+    for _ in range(5):
+        all_headers = {'Cookie': session.header(url), 'Connection': 'keep-alive', **(headers or {})}
+        status, resp_headers, text = _pool.request(method, url, body, all_headers)
+        session.update(url, resp_headers)
+        if status in (301, 302, 303, 307) and resp_headers.get('Location'):
+            url = urljoin(url, resp_headers['Location'])
+            method, body = 'GET', None
+            continue
+        return status, url, text
+    raise DirectExportError(f"Demasiadas redirecciones en {url}")
+
+def _open_view(session, start_url):
+    """Pedir la vista y devolver su ViewState"""
+    status, url, text = _fetch(session, 'GET', start_url)
+    if _is_login(text):
+        raise SessionExpired("La sesión ha caducado")
+    viewstate = _viewstate(text)
+    if status != 200 or not viewstate:
+        raise DirectExportError(f"La vista {start_url} no devolvió ViewState (HTTP {status})")
+    return viewstate
+
+def _replay_once(session, recipe, params):
+    viewstate = _open_view(session, recipe['start_url'])
+    total = len(recipe['requests'])
+    confirm = recipe['confirm_index']
+
+    for i, req in enumerate(recipe['requests']):
+        # Desde el POST de Aceptar el correo puede haber salido: ningún fallo se reintenta
+        exported = i >= confirm
+        fields = []
+        for name, value in req['fields']:
+            if name == VIEWSTATE:
+                value = viewstate
+            elif isinstance(value, dict):
+                value = params[value['param']]
+            fields.append((name, value))
+
+        try:
+            status, url, text = _fetch(session, 'POST', req['url'], urlencode(fields), req['headers'])
+        except Exception as e:
+            raise DirectExportError(f"POST {i + 1}/{total} fallido: {str(e)}", exported=exported)
+
+        errors = _ERROR_RE.findall(text)
+        redirect = _REDIRECT_RE.search(text)
+        if exported and (status != 200 or errors or redirect and 'login' in redirect.group(1).lower()
+                         or _is_login(text)):
+            raise DirectExportError(f"POST {i + 1}/{total} tras Aceptar: HTTP {status} {' '.join(errors)}".strip(),
+                                    exported=True)
+        if any('ViewExpired' in e for e in errors):
+            raise ViewExpired("ViewState caducado")
+        if (redirect and 'login' in redirect.group(1).lower()) or _is_login(text):
+            raise SessionExpired("La sesión ha caducado")
+        if status != 200 or errors:
+            raise DirectExportError(f"POST {i + 1}/{total}: HTTP {status} {' '.join(errors)}".strip())
+
+        viewstate = _viewstate(text) or viewstate
+    return total
+
+def replay(recipe, cookies, params=None):
+    """Repetir la receta (bloqueante); si el ViewState caduca se reabre la vista una vez"""
+    session = DirectSession(cookies)
+    try:
+        return _replay_once(session, recipe, params or {})
+    except ViewExpired:
+        print("   ♻️  ViewState caducado, reabriendo la vista...")
+        return _replay_once(session, recipe, params or {})
+
+async def run_direct(report, cookies, params=None):
+    """
+    Ejecutar el reporte por HTTP si hay receta grabada
+    Devuelve el número de POST enviados, o None si no hay receta
+    """
+    recipe = get_recipe(report)
+    if not recipe:
+        return None
+    return await asyncio.to_thread(replay, recipe, cookies, params)
@@ -0,0 +1,241 @@
+"""
+Motor asíncrono de reportes del CRM BeyondUp
+Un bucle de eventos, un navegador y una sesión compartida; cada trabajo
+corre en su propia página y como mucho MAX_CONCURRENCY a la vez, de modo
+que las esperas al CRM de un reporte se solapan con las de los demás
+"""
+
+from playwright.async_api import async_playwright
+import asyncio
+import time
+import os
+
+from beyondup_common import (
+    MAX_CONCURRENCY, CURRENT_JOB, save_screenshot, flush_artifacts, launch_browser, new_page
+)
+from beyondup_session import open_session, ensure_logged_in
+from beyondup_navigation import direct_url
+from beyondup_routing import route_report, format_report
+from beyondup_metrics import step, collect_steps, flush_metrics
+from beyondup_direct import (
+    DIRECT_EXPORT, DirectExportError, ExportRecorder, run_direct, save_recipe
+)
+from beyondup_ledger import Checkpoints
+from beyondup_timeouts import CRMDegraded
+from beyondup_guard import CircuitOpen, crm_action
+from beyondup_aimd import ADAPTIVE_CONCURRENCY, AIMDLimiter
+from beyondup_reports import REPORTS  # reexportado para el lote, el demonio y el benchmark
+import beyondup_flow
+
+# Intentos de un trabajo en el navegador; los reintentos reutilizan la página
+# y retoman desde el último punto de control (nunca tras pulsar Aceptar)
+JOB_ATTEMPTS = int(os.getenv('JOB_ATTEMPTS', '2'))
+
+class ReportEngine:
+    """
+    Navegador y sesión compartidos por todos los trabajos
+
+        async with ReportEngine(concurrency=3) as engine:
+            results = await engine.run_all(['tareas_actuales', 'tareas_futuras'])
+    """
+
+    def __init__(self, concurrency=MAX_CONCURRENCY, adaptive=ADAPTIVE_CONCURRENCY):
+        self.concurrency = max(1, concurrency)
+        # Con adaptive, concurrency es el techo y AIMD lo rebaja si el CRM se degrada
+        self.semaphore = AIMDLimiter(self.concurrency) if adaptive else asyncio.Semaphore(self.concurrency)
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.home_url = None
+
+    async def start(self):
+        """Lanzar el navegador e iniciar (o reutilizar) la sesión"""
+        self.playwright = await async_playwright().start()
+        try:
+            self.browser = await launch_browser(self.playwright)
+            self.context, page, self.home_url = await open_session(self.browser)
+            await page.close()
+        except Exception:
+            await self.stop()
+            raise
+        return self
+
+    async def stop(self):
+        """Cerrar navegador y driver de Playwright"""
+        if isinstance(self.semaphore, AIMDLimiter):
+            self.semaphore.close()
+        if self.browser:
+            await self.browser.close()
+            self.browser = None
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _run_direct(self, name, params):
+        """
+        Intentar la exportación directa por HTTP; devuelve True si se hizo
+        Si falla antes del POST de exportación se vuelve al navegador
+        """
+        try:
+            async with crm_action('direct_export'):
+                with step('direct_export') as record:
+                    sent = record['requests'] = await run_direct(name, await self.context.cookies(), params)
+        except CircuitOpen:
+            raise
+        except DirectExportError as e:
+            if e.exported:
+                raise
+            print(f"   ⚠️  {name}: exportación directa fallida ({str(e)}); usando el navegador")
+            return False
+        except Exception as e:
+            print(f"   ⚠️  {name}: exportación directa fallida ({str(e)}); usando el navegador")
+            return False
+        if sent:
+            print(f"   ⚡ {name}: exportación directa ({sent} peticiones)")
+        return bool(sent)
+
+    def capacity(self):
+        """Trabajos que pueden correr ahora mismo a la vez"""
+        if isinstance(self.semaphore, AIMDLimiter):
+            return self.semaphore.limit
+        return self.concurrency
+
+    def concurrency_status(self):
+        """Estado del control AIMD (None con concurrencia fija)"""
+        if isinstance(self.semaphore, AIMDLimiter):
+            return self.semaphore.status()
+        return None
+
+    def is_running(self):
+        """True si el navegador sigue vivo"""
+        return self.browser is not None and self.browser.is_connected()
+
+    async def _run_browser(self, page, name, checkpoints, on_range, recorder=None):
+        """Flujo en el navegador con reintentos desde el último punto de control"""
+        for attempt in range(1, JOB_ATTEMPTS + 1):
+            if not checkpoints.pending():
+                # Un fallo posterior a la última confirmación: no queda nada por exportar
+                return True
+            if recorder:
+                # La receta solo con los POST del intento que termine, y solo si parte de la vista
+                recorder.reset(complete=not checkpoints.reached('filter'))
+            try:
+                return bool(await beyondup_flow.run(page, name, checkpoints.ranges, on_range, checkpoints,
+                                                    recorder and recorder.mark_confirm))
+            except Exception as e:
+                # Con el CRM degradado un reintento solo volvería a ocupar la página
+                if (attempt == JOB_ATTEMPTS or checkpoints.uncertain() or page.is_closed()
+                        or isinstance(e, (CRMDegraded, CircuitOpen))):
+                    raise
+                last = checkpoints.steps[-1] if checkpoints.steps else 'el inicio'
+                print(f"   ♻️  {name}: intento {attempt} fallido ({str(e).splitlines()[0]}); "
+                      f"se reintenta desde {last}")
+
+    async def run_job(self, name, on_start=None, ranges=None, on_range=None, force=False):
+        """
+        Ejecutar un reporte en una página nueva del contexto autenticado
+        Devuelve {'ok', 'seconds', 'error', 'steps', 'network', 'skipped'}; ok equivale al True/False de main()
+        on_start se llama cuando el trabajo obtiene su turno de ejecución
+        ranges sustituye a los rangos de fechas de la definición (beyondup_flow.resolve_ranges)
+        on_range se llama tras exportar cada rango en el navegador
+        Las exportaciones ya confirmadas en el registro se omiten salvo con force
+        """
+        async with self.semaphore:
+            if on_start:
+                on_start()
+            CURRENT_JOB.set(name)
+            steps = collect_steps()
+            print(f"\n▶️  {name} iniciado")
+            page = None
+            network = None
+            ok = False
+            start = time.monotonic()
+            checkpoints = Checkpoints(name, ranges or beyondup_flow.date_ranges(REPORTS[name]), force)
+            ranges = checkpoints.ranges
+            # La receta directa corresponde a una sola exportación
+            direct = DIRECT_EXPORT and len(ranges) <= 1
+            params = beyondup_flow.params(name, ranges)
+            try:
+                if not checkpoints.pending():
+                    ok, error = True, None
+                    print(f"   ⏭️  {name}: nada pendiente")
+                elif direct and await self._run_direct(name, params):
+                    checkpoints.confirmed(ranges[0] if ranges else None)
+                    ok, error = True, None
+                else:
+                    page = await new_page(self.context)
+                    # La comprobación de sesión va en la carga del enlace directo de la vista
+                    # (si lo hay): sin pasar antes por la página de inicio
+                    self.home_url = await ensure_logged_in(page, self.home_url,
+                                                           direct_url(REPORTS[name]['view']))
+                    # Tras el login, para que la receta no incluya las credenciales
+                    recorder = ExportRecorder(page, params) if direct else None
+                    ok = await self._run_browser(page, name, checkpoints, on_range, recorder)
+                    error = None if ok else "El reporte terminó sin completar la exportación"
+                    if ok and recorder and recorder.recipe():
+                        save_recipe(name, recorder.recipe())
+                        print(f"   💾 {name}: receta de exportación directa grabada")
+                    if not ok:
+                        checkpoints.failed(error)
+            except asyncio.CancelledError:
+                # Que la fila 'running' no bloquee el reintento del trabajo en este proceso
+                checkpoints.failed("Trabajo cancelado")
+                raise
+            except Exception as e:
+                ok, error = False, str(e)
+                if isinstance(e, DirectExportError) and e.exported:
+                    checkpoints.confirm_sent(ranges[0] if ranges else None)
+                checkpoints.failed(error)
+                try:
+                    await save_screenshot(page, "99_error", level='error')
+                except:
+                    pass
+            finally:
+                if page:
+                    network = route_report(page)
+                    if not ok:
+                        # Fallo sin captura de error (p. ej. run() devolvió False)
+                        await flush_artifacts(page)
+                    try:
+                        await page.close()
+                    except:
+                        pass
+
+            result = {'ok': ok, 'seconds': round(time.monotonic() - start, 1), 'error': error,
+                      'steps': [{k: r[k] for k in ('step', 'duration_s', 'retries', 'outcome')} for r in steps],
+                      'network': network, 'skipped': checkpoints.skipped}
+            flush_metrics()
+            if network:
+                print(f"   🚫 {name} red: {format_report(network)}")
+            if ok:
+                print(f"\n✅ {name} completado en {result['seconds']}s")
+            else:
+                print(f"\n❌ {name} falló: {error}")
+            return result
+
+    async def run_all(self, names, ranges=None, force=False):
+        """Ejecutar varios reportes a la vez (hasta el límite de concurrencia)"""
+        results = await asyncio.gather(*(self.run_job(name, ranges=ranges, force=force) for name in names))
+        return dict(zip(names, results))
+
+async def run_reports(names, concurrency=MAX_CONCURRENCY, ranges=None, force=False):
+    """
+    Lanzar un motor, ejecutar los reportes y cerrarlo
+    Si el login falla, todos los reportes se marcan como fallidos
+    """
+    try:
+        engine = await ReportEngine(concurrency).start()
+    except Exception as e:
+        print(f"   ❌ Login fallido: {str(e)}")
+        return {name: {'ok': False, 'seconds': 0.0, 'error': f"Login fallido: {e}"} for name in names}
+
+    try:
+        return await engine.run_all(names, ranges, force)
+    finally:
+        await engine.stop()
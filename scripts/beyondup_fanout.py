@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Ejecución de los reportes del CRM BeyondUp para varias cuentas a la vez
+Lee un inventario de credenciales (ACCOUNTS_FILE) y reparte las cuentas
+entre procesos trabajadores: cada proceso tiene su propio Chromium y
+contexto aislado (sesión, cachés, registro y screenshots en su carpeta de
+FANOUT_DIR) y ejecuta los reportes de la cuenta como beyondup_batch.py.
+Los resultados se recogen en el proceso principal; el fallo, cuelgue o
+caída de una cuenta no detiene a las demás.
+
+    {
+      "cliente_a": {"user": "a@cliente.es", "pass_env": "CLIENTE_A_PASS"},
+      "cliente_b": {"user": "b@cliente.es", "pass": "...", "reports": ["tareas_actuales"],
+                    "url": "https://login.beyondup.es", "env": {"DIRECT_EXPORT": "true"}}
+    }
+
+Uso:
+    python3 beyondup_fanout.py                         # todas las cuentas y reportes
+    python3 beyondup_fanout.py cliente_a cliente_b --reports tareas_actuales tareas_futuras
+    python3 beyondup_fanout.py --workers 4 --output /app/logs/fanout.json
+"""
+
+from datetime import datetime
+from pathlib import Path
+import multiprocessing
+import argparse
+import asyncio
+import time
+import sys
+import os
+import re
+
+# Sin imports de beyondup_* a nivel de módulo: cada trabajador fija el
+# entorno de su cuenta antes de importarlos (leen la configuración al importar)
+ACCOUNTS_FILE = Path(os.getenv('ACCOUNTS_FILE', str(Path(__file__).with_name('accounts.json'))))
+FANOUT_DIR = Path(os.getenv('FANOUT_DIR', '/tmp/beyondup_accounts'))
+# Segundos máximos por cuenta antes de terminar su proceso
+FANOUT_TIMEOUT = float(os.getenv('FANOUT_TIMEOUT', '3600'))
+
+def available_cores():
+    """Núcleos disponibles para el proceso (respeta los límites del contenedor)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+FANOUT_WORKERS = int(os.getenv('FANOUT_WORKERS', str(available_cores())))
+
+def account_dir(name):
+    return FANOUT_DIR / re.sub(r'[^\w.-]', '_', name)
+
+def account_env(name, account):
+    """Variables de entorno del trabajador de una cuenta"""
+    password = account.get('pass')
+    if password is None and account.get('pass_env'):
+        password = os.getenv(account['pass_env'])
+    if not account.get('user') or not password:
+        raise ValueError("faltan 'user' y 'pass' (o 'pass_env' con la variable definida)")
+
+    directory = account_dir(name)
+    env = {
+        'BEYONDUP_USER': account['user'],
+        'BEYONDUP_PASS': password,
+        'SESSION_FILE': str(directory / 'session.json'),
+        'NAV_CACHE_FILE': str(directory / 'nav_cache.json'),
+        'SELECTOR_CACHE_FILE': str(directory / 'selector_cache.json'),
+        'DIRECT_RECIPES_FILE': str(directory / 'direct_recipes.json'),
+        'LEDGER_FILE': str(directory / 'ledger.sqlite3'),
+        'SCREENSHOTS_DIR': str(directory / 'screenshots'),
+        'METRICS_TEXTFILE': str(directory / 'beyondup.prom'),
+    }
+    if account.get('url'):
+        env['BEYONDUP_URL'] = account['url']
+    env.update({key: str(value) for key, value in (account.get('env') or {}).items()})
+    return env
+
+def load_accounts(path=ACCOUNTS_FILE):
+    """Inventario de cuentas; las incorrectas se avisan y se ignoran"""
+    from beyondup_common import read_json
+    from beyondup_reports import REPORTS
+
+    accounts = {}
+    for name, account in (read_json(path, {}) or {}).items():
+        try:
+            env = account_env(name, account)
+            reports = account.get('reports') or list(REPORTS)
+            unknown = [r for r in reports if r not in REPORTS]
+            if unknown:
+                raise ValueError(f"reportes desconocidos: {', '.join(unknown)}")
+            accounts[name] = {'env': env, 'reports': reports}
+        except (AttributeError, TypeError, ValueError) as e:
+            print(f"   ⚠️  {path}: cuenta '{name}' ignorada ({str(e)})")
+    return accounts
+
+def _run_account(name, env, reports, concurrency, force, results):
+    """Proceso trabajador: un navegador para los reportes de una cuenta"""
+    os.environ.update(env)
+    directory = account_dir(name)
+    directory.mkdir(parents=True, exist_ok=True)
+    log = open(directory / 'run.log', 'a', buffering=1)
+    sys.stdout = sys.stderr = log
+    print(f"\n{'=' * 70}\n🚀 {name} ({env['BEYONDUP_USER']}) {datetime.now():%d/%m/%Y %H:%M:%S}\n{'=' * 70}")
+    try:
+        from beyondup_engine import run_reports
+        outcome = asyncio.run(run_reports(reports, concurrency, force=force))
+    except BaseException as e:
+        print(f"❌ {name}: {str(e)}")
+        outcome = {report: {'ok': False, 'seconds': 0.0, 'error': str(e)} for report in reports}
+    results.put((name, outcome))
+    log.flush()
+
+def fan_out(accounts, workers, concurrency, force=False, timeout=FANOUT_TIMEOUT):
+    """
+    Ejecutar las cuentas en como mucho `workers` procesos a la vez
+    Devuelve {cuenta: {reporte: resultado}}
+    """
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    pending = list(accounts)
+    running = {}
+    collected = {}
+
+    def finish(name, outcome):
+        collected[name] = outcome
+        ok = sum(1 for r in outcome.values() if r['ok'])
+        icon = "✅" if ok == len(outcome) else "❌"
+        print(f"   {icon} {name}: {ok}/{len(outcome)} reportes ({len(collected)}/{len(accounts)} cuentas)")
+
+    while pending or running:
+        while pending and len(running) < workers:
+            name = pending.pop(0)
+            account = accounts[name]
+            process = ctx.Process(target=_run_account, name=f"beyondup-{name}", daemon=True,
+                                  args=(name, account['env'], account['reports'], concurrency, force, results))
+            process.start()
+            running[name] = (process, time.monotonic())
+            print(f"   ▶️  {name}: {len(account['reports'])} reportes (pid {process.pid})")
+
+        try:
+            name, outcome = results.get(timeout=1)
+            finish(name, outcome)
+        except Exception:
+            pass
+
+        for name, (process, started) in list(running.items()):
+            if name in collected:
+                process.join(timeout=5)
+                del running[name]
+            elif not process.is_alive():
+                # Puede haber terminado justo después de dejar su resultado en la cola
+                try:
+                    other, outcome = results.get(timeout=1)
+                    finish(other, outcome)
+                    continue
+                except Exception:
+                    pass
+                del running[name]
+                error = f"El proceso terminó sin resultado (código {process.exitcode})"
+                finish(name, {r: {'ok': False, 'seconds': 0.0, 'error': error} for r in accounts[name]['reports']})
+            elif time.monotonic() - started > timeout:
+                process.terminate()
+                process.join(timeout=10)
+                del running[name]
+                error = f"Tiempo máximo agotado ({timeout:.0f}s)"
+                finish(name, {r: {'ok': False, 'seconds': round(timeout, 1), 'error': error}
+                              for r in accounts[name]['reports']})
+    return collected
+
+def print_summary(collected):
+    print("\n" + "=" * 70)
+    print("📊 RESUMEN POR CUENTA")
+    print("=" * 70)
+    for name, outcome in collected.items():
+        ok = sum(1 for r in outcome.values() if r['ok'])
+        print(f"   {'✅' if ok == len(outcome) else '❌'} {name:<28} {ok}/{len(outcome)}")
+        for report, result in outcome.items():
+            if not result['ok']:
+                print(f"      💥 {report}: {str(result['error']).splitlines()[0]}")
+        print(f"      📄 {account_dir(name) / 'run.log'}")
+
+def main():
+    from beyondup_common import MAX_CONCURRENCY, write_json
+    from beyondup_reports import REPORTS
+
+    parser = argparse.ArgumentParser(description="Ejecuta los reportes BeyondUp de varias cuentas en paralelo")
+    parser.add_argument('accounts', nargs='*', metavar='CUENTA', help="Cuentas a ejecutar (por defecto, todas)")
+    parser.add_argument('--reports', nargs='+', metavar='REPORTE', help="Reportes para todas las cuentas")
+    parser.add_argument('--workers', type=int, default=FANOUT_WORKERS,
+                        help=f"Procesos simultáneos, uno por cuenta (por defecto {FANOUT_WORKERS}, los núcleos)")
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENCY, help="Reportes simultáneos por cuenta")
+    parser.add_argument('--force', action='store_true', help="Exportar aunque el registro indique que ya se hizo")
+    parser.add_argument('--output', type=Path, help="Guardar los resultados en un JSON")
+    args = parser.parse_args()
+
+    accounts = load_accounts()
+    unknown = [name for name in args.accounts if name not in accounts]
+    if unknown:
+        parser.error(f"cuentas desconocidas o no válidas en {ACCOUNTS_FILE}: {', '.join(unknown)}")
+    if args.reports:
+        bad = [r for r in args.reports if r not in REPORTS]
+        if bad:
+            parser.error(f"reportes desconocidos: {', '.join(bad)}")
+        for account in accounts.values():
+            account['reports'] = list(dict.fromkeys(args.reports))
+    accounts = {name: accounts[name] for name in dict.fromkeys(args.accounts or accounts)}
+    if not accounts:
+        print(f"❌ Sin cuentas válidas en {ACCOUNTS_FILE}")
+        return False
+
+    workers = max(1, min(args.workers, len(accounts)))
+    print("=" * 70)
+    print("🚀 AUTOMATIZACIÓN CRM BEYONDUP - VARIAS CUENTAS")
+    print("=" * 70)
+    print(f"\n📅 Fecha: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+    print(f"👥 Cuentas: {len(accounts)} en {workers} procesos ({args.concurrency} reportes por cuenta)")
+
+    collected = fan_out(accounts, workers, max(1, args.concurrency), args.force)
+    print_summary(collected)
+    if args.output:
+        write_json(args.output, collected)
+        print(f"\n💾 Resultados: {args.output}")
+    return all(r['ok'] for outcome in collected.values() for r in outcome.values())
+
+if __name__ == "__main__":
+    try:
+        sys.exit(0 if main() else 1)
+    except KeyboardInterrupt:
+        print("\n\n⏸️  Proceso interrumpido por el usuario")
+        sys.exit(130)
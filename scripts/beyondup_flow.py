@@ -0,0 +1,428 @@
+"""
+Flujo común de los reportes del CRM BeyondUp
+Ejecuta una definición de beyondup_reports: navegar a la vista, aplicar los
+filtros por columna y el rango de fechas, exportar a Excel y confirmar el
+envío por correo. Las optimizaciones de esperas, selectores y capturas se
+aplican aquí una sola vez para todos los reportes.
+"""
+
+from playwright.async_api import async_playwright
+from datetime import datetime
+import calendar
+import argparse
+import asyncio
+import sys
+
+from beyondup_common import (
+    USERNAME, URL, HEADLESS, SCREENSHOTS_DIR, CURRENT_JOB,
+    check_credentials, save_screenshot, launch_browser
+)
+from beyondup_session import open_session
+from beyondup_waits import wait_for_ajax, mark_table, wait_for_table_refresh
+from beyondup_navigation import navigate
+from beyondup_selectors import click_element
+from beyondup_metrics import step
+from beyondup_timeouts import CRMDegraded, within
+from beyondup_guard import crm_action
+from beyondup_reports import get_report
+from beyondup_ledger import Checkpoints
+
+# Disparar input/change en el filtro (sin depender de un selector CSS concreto)
+_DISPATCH_JS = '''
+(input) => {
+    input.dispatchEvent(new Event('input', { bubbles: true }));
+    input.dispatchEvent(new Event('change', { bubbles: true }));
+}
+'''
+
+# Último recurso si el filtro no es visible: rellenarlo y pulsar Enter desde JS
+_FILL_BY_PLACEHOLDER_JS = '''
+([column, value]) => {
+    const input = Array.from(document.querySelectorAll('input[type="text"]'))
+        .find(el => (el.getAttribute('placeholder') || '').toLowerCase().includes(column.toLowerCase()));
+    if (!input) return false;
+    input.focus();
+    input.value = value;
+    input.dispatchEvent(new Event('input', { bubbles: true }));
+    input.dispatchEvent(new Event('change', { bubbles: true }));
+    input.dispatchEvent(new KeyboardEvent('keydown', { key: 'Enter', code: 'Enter', keyCode: 13, which: 13, bubbles: true }));
+    return true;
+}
+'''
+
+# Dejar todos los filtros con su valor sin disparar eventos (cada evento
+# lanzaría su propia consulta); devuelve las columnas sin filtro y el
+# placeholder del último encontrado, que es el que envía el filtrado
+_STAGE_FILTERS_JS = '''
+(filters) => {
+    const inputs = Array.from(document.querySelectorAll('input[type="text"]'));
+    const missing = [];
+    let submit = null;
+    for (const [column, value] of Object.entries(filters)) {
+        const input = inputs.find(el => (el.getAttribute('placeholder') || '').toLowerCase().includes(column.toLowerCase()));
+        if (!input) { missing.push(column); continue; }
+        input.value = value;
+        submit = input.getAttribute('placeholder');
+    }
+    return { missing, submit };
+}
+'''
+
+# Comprobar cada filtro: el valor que quedó en el campo y las filas de su
+# columna que no lo contienen (sin distinguir mayúsculas ni acentos)
+_CHECK_FILTERS_JS = '''
+(filters) => {
+    const norm = s => (s || '').normalize('NFD').replace(/[\\u0300-\\u036f]/g, '').trim().toLowerCase();
+    const inputs = Array.from(document.querySelectorAll('input[type="text"]'));
+    const result = {};
+    for (const [column, value] of Object.entries(filters)) {
+        const input = inputs.find(el => (el.getAttribute('placeholder') || '').toLowerCase().includes(column.toLowerCase()));
+        const th = input && input.closest('th');
+        const index = th ? th.cellIndex : -1;
+        // Solo las filas de la tabla de datos a la que pertenece el filtro
+        const table = input && input.closest('.ui-datatable');
+        const rows = table ? Array.from(table.querySelectorAll('.ui-datatable-data > tr'))
+            .filter(row => row.closest('.ui-datatable') === table
+                && !row.classList.contains('ui-datatable-empty-message')) : [];
+        const wrong = index < 0 ? 0 : rows.filter(row => row.cells[index]
+            && !norm(row.cells[index].textContent).includes(norm(value))).length;
+        result[column] = { value: input ? input.value : null, wrong };
+    }
+    return result;
+}
+'''
+
+# Diálogo Filtro de Tareas Cerradas: fecha_inicio lleva el inicio del rango,
+# fecha_inicio_fin el final y fecha_fin (fecha de vencimiento) se vacía
+_FILL_DATES_JS = '''
+([inicio, fin]) => {
+    const filled = {};
+    for (const input of document.querySelectorAll('input[name*="fecha_"]')) {
+        const name = input.name.toLowerCase();
+        let value;
+        if (name.includes('fecha_inicio')) value = name.includes('fin') ? fin : inicio;
+        else if (name.includes('fecha_fin')) value = '';
+        else continue;
+        input.value = value;
+        input.dispatchEvent(new Event('input', { bubbles: true }));
+        input.dispatchEvent(new Event('change', { bubbles: true }));
+        filled[input.name] = value;
+    }
+    return filled;
+}
+'''
+
+def get_quarter(offset=0):
+    """
+    Fechas (dd/mm/aaaa) y nombre del trimestre con offset
+    offset = 0: trimestre actual, -1: anterior, -2: hace 2 trimestres
+    """
+    today = datetime.now()
+    year, quarter = divmod(today.year * 4 + (today.month - 1) // 3 + offset, 4)
+    first_month, last_month = quarter * 3 + 1, quarter * 3 + 3
+    last_day = calendar.monthrange(year, last_month)[1]
+    return f"01/{first_month:02d}/{year}", f"{last_day:02d}/{last_month:02d}/{year}", f"Q{quarter + 1}-{year}"
+
+def parse_range(text):
+    """'01/01/2024:31/03/2024' -> (fecha_inicio, fecha_fin, etiqueta); ValueError si no es válido"""
+    fecha_inicio, sep, fecha_fin = text.partition(':')
+    start, end = (datetime.strptime(value.strip(), '%d/%m/%Y') for value in (fecha_inicio, fecha_fin))
+    if not sep or end < start:
+        raise ValueError(f"Rango no válido: {text}")
+    return start.strftime('%d/%m/%Y'), end.strftime('%d/%m/%Y'), f"{start:%d/%m/%Y}-{end:%d/%m/%Y}"
+
+def resolve_ranges(quarters=(), ranges=()):
+    """Rangos de fechas a partir de desplazamientos de trimestre y rangos 'inicio:fin'"""
+    return [get_quarter(int(offset)) for offset in quarters] + [parse_range(text) for text in ranges]
+
+def date_ranges(report):
+    """
+    Rangos (fecha_inicio, fecha_fin, etiqueta) que exporta el reporte
+    'dates' admite {'quarter': n}, {'quarters': [...]} y {'ranges': ['inicio:fin', ...]}
+    """
+    dates = report['dates'] or {}
+    quarters = dates.get('quarters', [dates['quarter']] if 'quarter' in dates else [])
+    return resolve_ranges(quarters, dates.get('ranges', []))
+
+def params(name, ranges=None):
+    """Valores del filtro de esta ejecución (para la exportación directa); solo con un rango"""
+    ranges = ranges or date_ranges(get_report(name))
+    if len(ranges) != 1:
+        return {}
+    return {'fecha_inicio': ranges[0][0], 'fecha_fin': ranges[0][1]}
+
+async def apply_filter(page, column, value):
+    """Aplicar el filtro de una columna (por placeholder) y comprobar que quedó; devuelve True si se aplicó"""
+    print(f"   🔍 Aplicando filtro '{column}' = '{value}'...")
+    await mark_table(page)
+    input_field = page.locator(f'input[placeholder*="{column}" i]').first
+
+    try:
+        if await input_field.is_visible(timeout=2000):
+            await input_field.click()
+            await input_field.fill(value)
+            await input_field.evaluate(_DISPATCH_JS)
+            await input_field.press('Enter')
+            await page.click('body')
+        elif not await page.evaluate(_FILL_BY_PLACEHOLDER_JS, [column, value]):
+            print(f"   ⚠️  No se encontró el filtro '{column}'")
+            return False
+        await wait_for_table_refresh(page, fallback=4)
+
+        # El CRM a veces ignora el primer Enter: comprobar el valor y repetir una vez
+        current = await input_field.input_value(timeout=2000)
+        if current.strip().lower() != value.lower():
+            print(f"   ⚠️  El filtro '{column}' quedó con '{current}'; reintentando...")
+            await mark_table(page)
+            await page.evaluate(_FILL_BY_PLACEHOLDER_JS, [column, value])
+            await wait_for_table_refresh(page, fallback=2)
+    except Exception as e:
+        print(f"   ⚠️  Error: {str(e)}")
+        return False
+
+    print("   ✅ Filtro aplicado")
+    return True
+
+async def apply_filters(page, filters):
+    """
+    Aplicar varios filtros de columna con una sola consulta al servidor
+    Se rellenan todos los campos, se envía el filtrado una vez y se comprueba
+    que la tabla refleja todos; los que no quedaron se aplican uno a uno.
+    Devuelve la lista de columnas que no se pudieron aplicar
+    """
+    print(f"   🔍 Aplicando filtros: {', '.join(f'{c} = {v}' for c, v in filters.items())}")
+    await mark_table(page)
+    try:
+        staged = await page.evaluate(_STAGE_FILTERS_JS, filters)
+        if staged['submit']:
+            # Un Enter envía el formulario de la tabla con todos los valores
+            await page.locator(f'input[placeholder="{staged["submit"]}"]').first.press('Enter')
+            await wait_for_table_refresh(page, fallback=4)
+        checks = await page.evaluate(_CHECK_FILTERS_JS, filters)
+    except Exception as e:
+        print(f"   ⚠️  Error aplicando los filtros juntos: {str(e)}")
+        checks = {}
+
+    failed = []
+    for column, value in filters.items():
+        check = checks.get(column)
+        if check and (check['value'] or '').strip().lower() == value.lower() and not check['wrong']:
+            continue
+        if check and check['value'] is not None:
+            print(f"   ⚠️  El filtro '{column}' no quedó aplicado ('{check['value']}', {check['wrong']} filas no coinciden)")
+        if not await apply_filter(page, column, value):
+            failed.append(column)
+
+    if not failed:
+        print(f"   ✅ {len(filters)} filtros aplicados")
+    return failed
+
+async def apply_date_range(page, fecha_inicio, fecha_fin):
+    """
+    Abrir el diálogo Filtro de Tareas Cerradas, rellenar las fechas y aceptarlo
+    Los campos se rellenan en una sola operación sobre el DOM
+    """
+    await page.click('button[title*="Filtro"]', timeout=5000)
+    await page.wait_for_selector('input[name*="fecha_inicio"]', state='visible', timeout=10000)
+
+    filled = await page.evaluate(_FILL_DATES_JS, [fecha_inicio, fecha_fin])
+    if fecha_inicio not in filled.values():
+        raise Exception("No se encontraron los campos de fecha del diálogo Filtro")
+    print(f"   ✅ Fechas: {fecha_inicio} al {fecha_fin}")
+    await save_screenshot(page, "02_fechas_aplicadas", level='key')
+
+    # Aceptar filtro - usar selector específico del botón del diálogo de filtro
+    await mark_table(page)
+    await page.click('button[id*="btnFiltroAceptarTareas"]', timeout=10000)
+    # Esperar a que se procese el filtro, se recargue la tabla y desaparezca el overlay
+    await wait_for_table_refresh(page, fallback=5)
+
+async def _open_export(page, report, record):
+    """Pulsar Exportar a Excel y esperar al popup de confirmación"""
+    try:
+        selector = await click_element(page, report['export'], timeout=15000, record=record)
+        print(f"   ✅ Botón Excel encontrado: {selector}")
+    except CRMDegraded:
+        raise
+    except Exception:
+        await save_screenshot(page, "07_excel_no_encontrado", level='error')
+        raise Exception("Botón de Excel no encontrado")
+    await within(record, wait_for_ajax(page, fallback=3))
+
+async def export(page, report, on_confirm=None):
+    """
+    Pulsar Exportar a Excel y confirmar el envío por correo
+    on_confirm() se llama justo antes de pulsar Aceptar (desde ahí el correo puede salir)
+    """
+    async with crm_action('export'):
+        with step('export') as record:
+            await _open_export(page, report, record)
+    await save_screenshot(page, "08_excel_dialog")
+
+    async with crm_action('confirm'):
+        with step('confirm') as record:
+            if on_confirm:
+                on_confirm()
+            try:
+                # Solo el clic con el selector guardado tiene el tiempo aprendido (tras él el
+                # correo puede haber salido; los demás candidatos son un fallo de caché)
+                selector = await click_element(page, report['confirm'], timeout=10000, record=record)
+                print(f"   ✅ Confirmación enviada: {selector}")
+            except CRMDegraded:
+                raise
+            except Exception:
+                await save_screenshot(page, "09_popup_error", level='error')
+                raise Exception("No se pudo confirmar el popup de exportación")
+            await wait_for_ajax(page, fallback=3)
+    await save_screenshot(page, "10_final_result", level='key')
+
+async def run(page, name, ranges=None, on_range=None, checkpoints=None, on_confirm=None):
+    """
+    Navegación, filtros y exportación de un reporte sobre una sesión ya iniciada
+    Con varios rangos de fechas se exporta uno tras otro desde la misma vista,
+    reabriendo solo el diálogo Filtro; ranges sustituye a los de la definición
+    y on_range(rango) se llama tras exportar cada uno
+    checkpoints (beyondup_ledger.Checkpoints) registra el avance; si la vista
+    filtrada sigue abierta en la página, un reintento empieza por la exportación
+    on_confirm() se llama además justo antes de cada Aceptar
+    Devuelve False (sin exportar) si algún filtro no se pudo aplicar
+    """
+    report = get_report(name)
+    if checkpoints and not checkpoints.pending():
+        # Todo confirmado ya (p. ej. un reintento tras fallar on_range): nada que reenviar
+        return True
+    if ranges is None:
+        ranges = date_ranges(report)
+
+    def confirming(date_range=None):
+        if checkpoints:
+            checkpoints.confirm_sent(date_range)
+        if on_confirm:
+            on_confirm()
+
+    print(f"\n📍 {report['title'].upper()}")
+    print("-" * 70)
+    if checkpoints and checkpoints.reached('filter') and checkpoints.url == page.url:
+        print("   ♻️  Vista y filtros ya aplicados: se retoma desde la exportación")
+    else:
+        # En el primer intento la página ya está en el enlace directo (beyondup_engine);
+        # un reintento recarga la vista
+        await navigate(page, report['view'], loaded=bool(checkpoints) and not checkpoints.reached('navigate'))
+        await save_screenshot(page, "05_vista", level='key')
+        print(f"   ✅ En {' > '.join(report['view'])}")
+        if checkpoints:
+            checkpoints.mark('navigate', url=page.url)
+
+        if report['zoom']:
+            await page.evaluate(f"document.body.style.zoom = '{report['zoom']}'")
+
+        if report['filters']:
+            async with crm_action('filter'):
+                with step('filter', column=','.join(report['filters'])) as record:
+                    failed = await within(record, apply_filters(page, report['filters']))
+                    record['outcome'] = 'error' if failed else 'ok'
+            if failed:
+                # No exportar datos sin filtrar
+                print(f"   ⛔ No se pudieron aplicar los filtros {', '.join(failed)}; se detiene la exportación")
+                await save_screenshot(page, "06_filtro_error", level='error')
+                return False
+        elif not ranges:
+            # Sin filtros: esperar a que la tabla termine de cargar
+            await wait_for_ajax(page, fallback=2)
+        if checkpoints:
+            checkpoints.mark('filter', url=page.url)
+
+    if not ranges:
+        await save_screenshot(page, "06_antes_exportar")
+        await export(page, report, confirming)
+        if checkpoints:
+            checkpoints.confirmed()
+        return True
+
+    ranges = list(ranges)
+    for i, date_range in enumerate(ranges, 1):
+        fecha_inicio, fecha_fin, label = date_range
+        print(f"\n   📅 Período {i}/{len(ranges)}: {label} ({fecha_inicio} al {fecha_fin})")
+        async with crm_action('filter'):
+            with step('filter', period=label) as record:
+                await within(record, apply_date_range(page, fecha_inicio, fecha_fin))
+        await export(page, report, lambda: confirming(date_range))
+        print(f"   📧 {label} exportado")
+        if checkpoints:
+            checkpoints.confirmed(date_range)
+        if on_range:
+            on_range(date_range)
+    return True
+
+async def main(name, force=False):
+    """
+    Ejecutar un reporte en su propio navegador (uso desde línea de comandos)
+    Pasa por el registro de exportaciones como el motor: lo ya confirmado o
+    en curso en otra ejecución se omite salvo con force
+    """
+    report = get_report(name)
+    check_credentials()
+    # Las métricas, tiempos aprendidos y capturas van con el nombre del reporte, como en el motor
+    CURRENT_JOB.set(name)
+
+    print("=" * 70)
+    print(f"🚀 AUTOMATIZACIÓN CRM BEYONDUP - {report['title'].upper()}")
+    print("=" * 70)
+    print(f"\n📅 Fecha: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+    print(f"👤 Usuario: {USERNAME}")
+    print(f"🌐 URL: {URL}")
+    print(f"👁️  Modo: {'Headless' if HEADLESS else 'Visible'}")
+    print(f"📋 Vista: {' > '.join(report['view'])}")
+    for column, value in report['filters'].items():
+        print(f"🔍 Filtro: {column} = {value}")
+
+    checkpoints = Checkpoints(name, date_ranges(report), force)
+    if not checkpoints.pending():
+        print(f"\n⏭️  {report['title']}: nada pendiente (usa --force para repetirlo)\n")
+        return True
+
+    async with async_playwright() as p:
+        browser = await launch_browser(p)
+        page = None
+        try:
+            context, page, home_url = await open_session(browser)
+            print("   ✅ Login exitoso")
+
+            if not await run(page, name, checkpoints.ranges, checkpoints=checkpoints):
+                checkpoints.failed("El reporte terminó sin completar la exportación")
+                return False
+
+            print("\n" + "=" * 70)
+            print("✅ PROCESO COMPLETADO EXITOSAMENTE")
+            print("=" * 70)
+            print(f"\n📬 El reporte de {report['title']} ha sido solicitado.")
+            print("📧 Revisa tu correo en unos minutos.\n")
+            return True
+
+        except asyncio.CancelledError:
+            checkpoints.failed("Proceso interrumpido")
+            raise
+        except Exception as e:
+            checkpoints.failed(str(e))
+            print(f"\n❌ ERROR: {str(e)}\n")
+            if page:
+                try:
+                    await save_screenshot(page, "99_error", level='error')
+                except:
+                    pass
+            print(f"📸 Revisa los screenshots en: {SCREENSHOTS_DIR}")
+            print(f"📋 Verifica que la sección '{' > '.join(report['view'])}' existe y la interfaz no ha cambiado\n")
+            return False
+        finally:
+            await browser.close()
+
+def cli(name):
+    """Punto de entrada de los scripts de cada reporte"""
+    parser = argparse.ArgumentParser(description=f"Exporta el reporte BeyondUp {name}")
+    parser.add_argument('--force', action='store_true', help="Exportar aunque el registro indique que ya se hizo")
+    args = parser.parse_args()
+    try:
+        sys.exit(0 if asyncio.run(main(name, args.force)) else 1)
+    except KeyboardInterrupt:
+        print("\n\n⏸️  Proceso interrumpido por el usuario")
+        sys.exit(130)
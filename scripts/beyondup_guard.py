@@ -0,0 +1,157 @@
+"""
+Limitador y cortocircuito de las acciones pesadas sobre el CRM BeyondUp
+Todas las tareas de un proceso (motor, demonio, worker) comparten un mismo
+guardián: como mucho CRM_MAX_INFLIGHT acciones (login, navegación, filtros,
+exportación) en curso a la vez, y un circuito que se abre tras
+CIRCUIT_FAILURES fallos seguidos, incluidos los pasos degradados (los que
+agotan su tiempo aprendido en beyondup_timeouts). La duración total de la
+acción no cuenta: un fallo de caché (recorrer el menú, probar otros
+selectores) es lento pero no es un CRM degradado. Con el circuito abierto
+las acciones esperan en vez de insistir; pasado CIRCUIT_COOLDOWN_SECONDS se
+deja pasar una sonda (semiabierto): si va bien el circuito se cierra, si
+falla se vuelve a abrir con el doble de espera.
+
+    async with crm_action('export'):
+        ...
+"""
+
+from contextlib import asynccontextmanager
+import weakref
+import asyncio
+import time
+import os
+
+from beyondup_metrics import set_gauge
+
+CRM_MAX_INFLIGHT = int(os.getenv('CRM_MAX_INFLIGHT', '2'))
+CIRCUIT_FAILURES = int(os.getenv('CIRCUIT_FAILURES', '3'))
+CIRCUIT_COOLDOWN_SECONDS = float(os.getenv('CIRCUIT_COOLDOWN_SECONDS', '30'))
+CIRCUIT_MAX_COOLDOWN_SECONDS = float(os.getenv('CIRCUIT_MAX_COOLDOWN_SECONDS', '300'))
+# Tiempo máximo que una acción espera a que el circuito deje de estar abierto
+CIRCUIT_WAIT_SECONDS = float(os.getenv('CIRCUIT_WAIT_SECONDS', '120'))
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+class CircuitOpen(Exception):
+    """El CRM lleva un rato fallando: la acción no se lanza"""
+    outcome = 'circuit_open'
+
+class CRMGuard:
+    """Semáforo de acciones en curso más cortocircuito (un guardián por bucle de eventos)"""
+
+    def __init__(self, max_inflight=CRM_MAX_INFLIGHT, failures=CIRCUIT_FAILURES,
+                 cooldown=CIRCUIT_COOLDOWN_SECONDS):
+        self.max_inflight = max(1, max_inflight)
+        self.failures_to_open = max(1, failures)
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.inflight = 0
+        self.probing = False
+        self.trips = 0
+        self._changed = asyncio.Condition()
+
+    def _publish(self):
+        set_gauge('beyondup_crm_inflight', self.inflight, 'Acciones sobre el CRM en curso')
+        set_gauge('beyondup_circuit_state', _STATE_VALUES[self.state],
+                  'Circuito del CRM (0 cerrado, 1 semiabierto, 2 abierto)')
+
+    def _can_enter(self):
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            print("   🔌 Circuito del CRM semiabierto: se deja pasar una sonda")
+        if self.state == OPEN:
+            return False
+        if self.state == HALF_OPEN:
+            # Una única sonda; el resto espera a que se resuelva
+            return not self.probing and self.inflight < self.max_inflight
+        return self.inflight < self.max_inflight
+
+    async def acquire(self, action):
+        """Esperar un hueco; devuelve True si la acción es la sonda del circuito semiabierto"""
+        deadline = time.monotonic() + CIRCUIT_WAIT_SECONDS
+        async with self._changed:
+            while not self._can_enter():
+                if self.state == CLOSED:
+                    await self._changed.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CircuitOpen(f"CRM no disponible (circuito abierto): {action} no se lanza")
+                if self.state == OPEN:
+                    # Despertar al acabar el enfriamiento aunque nadie avise
+                    remaining = min(remaining, self.cooldown - (time.monotonic() - self.opened_at))
+                try:
+                    await asyncio.wait_for(self._changed.wait(), max(0.05, remaining))
+                except asyncio.TimeoutError:
+                    pass
+            probe = self.state == HALF_OPEN
+            self.probing = self.probing or probe
+            self.inflight += 1
+            self._publish()
+            return probe
+
+    async def release(self, action, probe, ok):
+        """Liberar el hueco; ok=None (cancelación) no cuenta para el circuito"""
+        async with self._changed:
+            self.inflight -= 1
+            if probe:
+                self.probing = False
+            if ok and probe:
+                print(f"   🔌 Circuito del CRM cerrado ({action} respondió bien)")
+                self.state = CLOSED
+                self.cooldown = self.base_cooldown
+            if ok and self.state == CLOSED:
+                self.failures = 0
+            elif ok is False and probe:
+                self.cooldown = min(self.cooldown * 2, CIRCUIT_MAX_COOLDOWN_SECONDS)
+                self._trip(f"la sonda {action} falló")
+            elif ok is False and self.state == CLOSED:
+                # Los fallos de acciones lanzadas antes de abrirse el circuito no cuentan
+                self.failures += 1
+                if self.failures >= self.failures_to_open:
+                    self._trip(f"{self.failures} fallos seguidos")
+            self._publish()
+            self._changed.notify_all()
+
+    def _trip(self, reason):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        print(f"   🔌 Circuito del CRM abierto ({reason}); se reintenta en {self.cooldown:.0f}s")
+
+    def status(self):
+        return {'state': self.state, 'inflight': self.inflight, 'max_inflight': self.max_inflight,
+                'failures': self.failures, 'trips': self.trips,
+                'cooldown_s': self.cooldown if self.state != CLOSED else None}
+
+_guards = weakref.WeakKeyDictionary()
+
+def guard():
+    """Guardián del bucle de eventos en curso (los primitivos de asyncio no se comparten entre bucles)"""
+    loop = asyncio.get_running_loop()
+    if loop not in _guards:
+        _guards[loop] = CRMGuard()
+    return _guards[loop]
+
+@asynccontextmanager
+async def crm_action(action):
+    """
+    Ejecutar una acción pesada sobre el CRM dentro del límite compartido
+    Sus fallos cuentan para el circuito, también CRMDegraded (un paso que
+    agotó el tiempo aprendido en su camino rápido)
+    """
+    shared = guard()
+    probe = await shared.acquire(action)
+    ok = False
+    try:
+        yield
+        ok = True
+    except asyncio.CancelledError:
+        ok = None
+        raise
+    finally:
+        await shared.release(action, probe, ok)
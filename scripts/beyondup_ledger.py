@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Registro persistente (SQLite) de las exportaciones del CRM BeyondUp
+Cada exportación se identifica por reporte y rango de fechas. Se anotan los
+puntos de control alcanzados (navigate, filter, dates, confirm_sent) y si el
+envío se confirmó, de modo que:
+
+- una exportación confirmada dentro de LEDGER_WINDOW_MINUTES no se repite
+- si el fallo llegó después de pulsar Aceptar (confirm_sent) no se reenvía
+  a ciegas: el correo puede haber salido; se repite solo con force
+- un reintento sobre la misma página retoma desde el último punto de control
+- un rango que otra ejecución viva está exportando (fila 'running' de otro
+  proceso, actualizada hace menos de LEDGER_RUNNING_MINUTES) se omite, aun
+  con force: el demonio, un worker de otra réplica o un enqueue repetido no
+  envían el mismo correo dos veces
+
+Uso:
+    python3 beyondup_ledger.py              # últimas exportaciones
+    python3 beyondup_ledger.py --limit 50
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import sqlite3
+import socket
+import json
+import sys
+import os
+
+LEDGER_FILE = Path(os.getenv('LEDGER_FILE', '/tmp/beyondup_ledger.sqlite3'))
+# Minutos durante los que una exportación confirmada no se vuelve a lanzar (0 = siempre)
+LEDGER_WINDOW_MINUTES = float(os.getenv('LEDGER_WINDOW_MINUTES', '60'))
+# Minutos sin avance tras los que una fila 'running' se da por abandonada
+LEDGER_RUNNING_MINUTES = float(os.getenv('LEDGER_RUNNING_MINUTES', '30'))
+
+# Identificador de este proceso en las filas que crea (host:pid)
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS exports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    report TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    steps TEXT NOT NULL DEFAULT '[]',
+    error TEXT,
+    started_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    confirmed_at TEXT,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS exports_key ON exports (key, id);
+'''
+
+_db = None
+
+def _connect():
+    """Conexión compartida del proceso (autocommit; WAL para varios procesos)"""
+    global _db
+    if _db is None:
+        LEDGER_FILE.parent.mkdir(parents=True, exist_ok=True)
+        _db = sqlite3.connect(LEDGER_FILE, timeout=30, isolation_level=None, check_same_thread=False)
+        _db.row_factory = sqlite3.Row
+        _db.execute('PRAGMA journal_mode=WAL')
+        _db.executescript(_SCHEMA)
+        # Registros creados antes de la columna owner
+        if 'owner' not in {row['name'] for row in _db.execute('PRAGMA table_info(exports)')}:
+            try:
+                _db.execute('ALTER TABLE exports ADD COLUMN owner TEXT')
+            except sqlite3.OperationalError:
+                pass  # otro proceso la añadió a la vez
+    return _db
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+def export_key(report, date_range=None):
+    """Clave de una exportación: reporte y, si lo hay, rango de fechas"""
+    if not date_range:
+        return report
+    return f"{report}:{date_range[0]}-{date_range[1]}"
+
+def _running_elsewhere(row):
+    """True si la fila 'running' pertenece a una ejecución que sigue viva"""
+    since = (datetime.now() - timedelta(minutes=LEDGER_RUNNING_MINUTES)).isoformat(timespec='seconds')
+    if row['status'] != 'running' or row['updated_at'] < since:
+        return False
+    host, _, pid = (row['owner'] or '').rpartition(':')
+    if host == socket.gethostname() and pid.isdigit():
+        # Mismo host: un proceso caído no bloquea hasta que caduque la fila
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+    return True
+
+def last_export(key):
+    """Último registro de una exportación (sqlite3.Row) o None"""
+    return _connect().execute('SELECT * FROM exports WHERE key = ? ORDER BY id DESC LIMIT 1', (key,)).fetchone()
+
+class Checkpoints:
+    """
+    Puntos de control de un trabajo: un registro por rango (o uno para
+    reportes sin fechas) que se actualiza a medida que avanza el flujo
+    """
+
+    def __init__(self, report, ranges=None, force=False, window=LEDGER_WINDOW_MINUTES):
+        self.report = report
+        self.steps = []
+        self.url = None
+        self.skipped = []
+        self._ids = {}
+        self._uncertain = False
+        db = _connect()
+        # Sin ventana (0) las confirmadas no se omiten
+        since = (datetime.now() - timedelta(minutes=window)).isoformat(timespec='seconds') if window > 0 else None
+
+        self.ranges = []
+        # Comprobar y reservar los rangos en una sola transacción: dos procesos
+        # que arrancan a la vez no pueden reservar el mismo
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            for date_range in ranges or [None]:
+                self._reserve(db, date_range, force, since)
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+
+    def _reserve(self, db, date_range, force, since):
+        key = export_key(self.report, date_range)
+        last = last_export(key)
+        label = date_range[2] if date_range else self.report
+        if last and _running_elsewhere(last):
+            print(f"   ⏳ {label}: otra ejecución lo está exportando ({last['owner'] or 'desconocida'}, "
+                  f"desde las {last['started_at'][11:16]}); se omite")
+            self.skipped.append(label)
+            return
+        if not force and since and last and last['updated_at'] >= since:
+            if last['status'] == 'confirmed':
+                print(f"   ⏭️  {label}: ya exportado a las {last['confirmed_at'][11:16]}; se omite")
+                self.skipped.append(label)
+                return
+            if last['status'] == 'confirm_sent':
+                print(f"   ⚠️  {label}: la última exportación falló tras confirmar (puede haber "
+                      f"llegado el correo); se omite, usa force para repetirla")
+                self.skipped.append(label)
+                return
+        params = {'fecha_inicio': date_range[0], 'fecha_fin': date_range[1]} if date_range else {}
+        cursor = db.execute(
+            'INSERT INTO exports (key, report, params, status, started_at, updated_at, owner) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (key, self.report, json.dumps(params), 'running', _now(), _now(), OWNER))
+        self._ids[date_range] = cursor.lastrowid
+        if date_range:
+            self.ranges.append(date_range)
+
+    def pending(self):
+        """True si queda algo por exportar"""
+        return bool(self._ids)
+
+    def _update(self, date_range=None, **fields):
+        ids = [self._ids[date_range]] if date_range in self._ids else list(self._ids.values())
+        fields['updated_at'] = _now()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        for row_id in ids:
+            _connect().execute(f'UPDATE exports SET {assignments} WHERE id = ?', (*fields.values(), row_id))
+
+    def reached(self, step):
+        return step in self.steps
+
+    def mark(self, step, url=None):
+        """Anotar un punto de control común a todos los rangos del trabajo"""
+        if step not in self.steps:
+            self.steps.append(step)
+        if url:
+            self.url = url
+        self._update(steps=json.dumps(self.steps))
+
+    def confirm_sent(self, date_range=None):
+        """Se va a pulsar el Aceptar de la exportación: a partir de aquí no se reintenta"""
+        self._uncertain = True
+        self._update(date_range, status='confirm_sent', steps=json.dumps(self.steps + ['confirm_sent']))
+
+    def confirmed(self, date_range=None):
+        self._uncertain = False
+        self._update(date_range, status='confirmed', confirmed_at=_now(),
+                     steps=json.dumps(self.steps + ['confirmed']))
+        # El rango ya no cuenta para reintentos del mismo trabajo
+        if date_range in self._ids:
+            del self._ids[date_range]
+            if date_range in self.ranges:
+                self.ranges.remove(date_range)
+
+    def uncertain(self):
+        """True si el último fallo llegó después de pulsar Aceptar"""
+        return self._uncertain
+
+    def failed(self, error):
+        """Marcar como fallidos los rangos pendientes (los confirm_sent conservan su estado)"""
+        for date_range, row_id in self._ids.items():
+            _connect().execute(
+                "UPDATE exports SET status = CASE WHEN status = 'confirm_sent' THEN status ELSE 'failed' END, "
+                "error = ?, updated_at = ? WHERE id = ?", (error, _now(), row_id))
+
+def main():
+    parser = argparse.ArgumentParser(description="Últimas exportaciones registradas")
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    rows = _connect().execute('SELECT * FROM exports ORDER BY id DESC LIMIT ?', (args.limit,)).fetchall()
+    icons = {'confirmed': '✅', 'confirm_sent': '⚠️ ', 'failed': '❌', 'running': '⏳'}
+    for row in rows:
+        steps = ' > '.join(json.loads(row['steps']))
+        print(f"{icons.get(row['status'], '  ')} {row['updated_at']} {row['key']:<45} {row['status']:<13} {steps}")
+        if row['error'] and row['status'] != 'confirmed':
+            print(f"      💥 {row['error']}")
+    print(f"\n💾 {LEDGER_FILE}")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,182 @@
+"""
+Instrumentación por pasos de los reportes del CRM BeyondUp
+Cada fase (launch, login, navigate, filter, export, confirm...) se envuelve
+en step(); al terminar se escribe una línea JSON en LOGS_DIR con duración,
+reintentos y resultado, y se acumula en histogramas Prometheus que se
+vuelcan a METRICS_TEXTFILE (para el textfile collector de node_exporter).
+Cada proceso debe tener su propio archivo: '{host}' en METRICS_TEXTFILE se
+sustituye por el nombre del host (p. ej. una réplica de worker).
+
+    with step('navigate'):
+        await navigate(page, ['CRM', 'Tareas', 'Cerradas'])
+
+El coste por paso es un time.monotonic() y una línea de log, así que puede
+quedarse activo en producción.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import contextvars
+import threading
+import atexit
+import socket
+import json
+import time
+import sys
+import os
+
+LOGS_DIR = Path(os.getenv('LOGS_DIR', '/tmp/beyondup_logs'))
+METRICS_TEXTFILE = Path(os.getenv('METRICS_TEXTFILE', str(LOGS_DIR / 'beyondup.prom'))
+                        .replace('{host}', socket.gethostname()))
+# Intervalo mínimo entre volcados del textfile (s); además se vuelca al terminar cada trabajo
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '10'))
+
+BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Paso en curso (para anotar reintentos) y pasos del trabajo en curso
+_CURRENT_STEP = contextvars.ContextVar('current_step', default=None)
+_JOB_STEPS = contextvars.ContextVar('job_steps', default=None)
+
+_lock = threading.Lock()
+_histograms = {}
+_outcomes = {}
+_retries = {}
+_gauges = {}
+_listeners = []
+_last_flush = 0.0
+
+def current_report():
+    from beyondup_common import CURRENT_JOB
+    return CURRENT_JOB.get() or Path(sys.argv[0]).stem
+
+def _log(record):
+    LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    path = LOGS_DIR / f"steps-{datetime.now().strftime('%Y%m%d')}.jsonl"
+    with open(path, 'a') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+def _observe(record):
+    key = (record['report'], record['step'])
+    with _lock:
+        hist = _histograms.setdefault(key, {'buckets': [0] * len(BUCKETS), 'sum': 0.0, 'count': 0})
+        for i, bound in enumerate(BUCKETS):
+            if record['duration_s'] <= bound:
+                hist['buckets'][i] += 1
+        hist['sum'] += record['duration_s']
+        hist['count'] += 1
+        outcome_key = key + (record['outcome'],)
+        _outcomes[outcome_key] = _outcomes.get(outcome_key, 0) + 1
+        _retries[key] = _retries.get(key, 0) + record['retries']
+        due = time.monotonic() - _last_flush >= METRICS_FLUSH_INTERVAL
+    if due:
+        flush_metrics()
+
+@contextmanager
+def step(name, **fields):
+    """
+    Medir un paso; el registro (dict) se puede completar dentro del bloque
+    Una excepción marca el paso como 'error' y se propaga
+    """
+    record = {'report': current_report(), 'step': name, 'retries': 0, **fields}
+    token = _CURRENT_STEP.set(record)
+    start = time.monotonic()
+    try:
+        yield record
+        record.setdefault('outcome', 'ok')
+    except BaseException as e:
+        # Las excepciones pueden traer su propio resultado (p. ej. 'degraded')
+        record['outcome'] = getattr(e, 'outcome', 'error')
+        record['error'] = str(e).splitlines()[0] if str(e) else type(e).__name__
+        raise
+    finally:
+        _CURRENT_STEP.reset(token)
+        record['duration_s'] = round(time.monotonic() - start, 3)
+        record = {'ts': datetime.now().isoformat(timespec='milliseconds'), 'pid': os.getpid(), **record}
+        steps = _JOB_STEPS.get()
+        if steps is not None:
+            steps.append(record)
+        try:
+            _log(record)
+            _observe(record)
+            for listener in _listeners:
+                listener(record)
+        except OSError as e:
+            print(f"   ⚠️  No se pudo registrar el paso {name}: {str(e)}")
+
+def on_step(listener):
+    """Llamar a listener(registro) al terminar cada paso (p. ej. beyondup_timeouts)"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+def off_step(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+def note_retry():
+    """Anotar un reintento en el paso en curso (lo llama retry_operation)"""
+    record = _CURRENT_STEP.get()
+    if record is not None:
+        record['retries'] += 1
+
+def collect_steps():
+    """Empezar a recoger los pasos del trabajo en curso; devuelve la lista que se irá llenando"""
+    steps = []
+    _JOB_STEPS.set(steps)
+    return steps
+
+def set_gauge(name, value, help_text='', **labels):
+    """Publicar un valor instantáneo en el textfile (p. ej. concurrencia actual)"""
+    with _lock:
+        _gauges[(name, tuple(sorted(labels.items())))] = (value, help_text)
+
+def _labels(**labels):
+    return ','.join(f'{k}="{str(v)}"' for k, v in labels.items())
+
+def render_metrics():
+    """Texto en formato de exposición de Prometheus"""
+    with _lock:
+        lines = [
+            '# HELP beyondup_step_duration_seconds Duración de cada paso de los reportes',
+            '# TYPE beyondup_step_duration_seconds histogram',
+        ]
+        for (report, name), hist in sorted(_histograms.items()):
+            for bound, count in zip(BUCKETS, hist['buckets']):
+                lines.append(f'beyondup_step_duration_seconds_bucket{{{_labels(report=report, step=name, le=bound)}}} {count}')
+            lines.append(f'beyondup_step_duration_seconds_bucket{{{_labels(report=report, step=name, le="+Inf")}}} {hist["count"]}')
+            lines.append(f'beyondup_step_duration_seconds_sum{{{_labels(report=report, step=name)}}} {hist["sum"]:.3f}')
+            lines.append(f'beyondup_step_duration_seconds_count{{{_labels(report=report, step=name)}}} {hist["count"]}')
+
+        lines += ['# HELP beyondup_steps_total Pasos terminados por resultado',
+                  '# TYPE beyondup_steps_total counter']
+        for (report, name, outcome), count in sorted(_outcomes.items()):
+            lines.append(f'beyondup_steps_total{{{_labels(report=report, step=name, outcome=outcome)}}} {count}')
+
+        lines += ['# HELP beyondup_step_retries_total Reintentos dentro de cada paso',
+                  '# TYPE beyondup_step_retries_total counter']
+        for (report, name), count in sorted(_retries.items()):
+            lines.append(f'beyondup_step_retries_total{{{_labels(report=report, step=name)}}} {count}')
+
+        family = None
+        for (name, labels), (value, help_text) in sorted(_gauges.items()):
+            if name != family:
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+                family = name
+            lines.append(f'{name}{{{_labels(**dict(labels))}}} {value}' if labels else f'{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+def flush_metrics():
+    """Escribir el textfile de forma atómica (node_exporter nunca ve un archivo a medias)"""
+    global _last_flush
+    if not _histograms and not _gauges:
+        return
+    _last_flush = time.monotonic()
+    try:
+        METRICS_TEXTFILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = METRICS_TEXTFILE.with_name(METRICS_TEXTFILE.name + f'.{os.getpid()}.tmp')
+        tmp.write_text(render_metrics())
+        os.replace(tmp, METRICS_TEXTFILE)
+    except OSError as e:
+        print(f"   ⚠️  No se pudo escribir {METRICS_TEXTFILE}: {str(e)}")
+
+atexit.register(flush_metrics)
@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+Servidor local que imita al CRM BeyondUp para pruebas y benchmarks
+Reproduce solo lo que tocan los scripts: el formulario formularioLogin, los
+menús CRM > Clientes > Empresas y CRM > Tareas > Actuales/Futuras/Cerradas,
+tablas con filtros por placeholder, el diálogo de filtro de fechas
+(btnFiltroAceptarTareas) y la exportación Excel + Aceptar. Las acciones son
+POST parciales JSF con ViewState, como en el CRM real, y durante cada
+petición se muestra un overlay .ui-blockui.
+
+    python3 beyondup_mock.py --port 8081 --latency 200 --overlay 300
+    BEYONDUP_URL=http://127.0.0.1:8081 python3 beyondup_batch.py
+
+    GET  /__mock/exports   exportaciones recibidas
+    POST /__mock/reset     vaciar exportaciones y sesiones
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+from datetime import datetime, timedelta
+import argparse
+import threading
+import secrets
+import random
+import html
+import json
+import time
+import os
+
+MOCK_HOST = os.getenv('MOCK_HOST', '127.0.0.1')
+MOCK_PORT = int(os.getenv('MOCK_PORT', '8081'))
+# Retardo del servidor en cada petición (ms)
+MOCK_LATENCY_MS = int(os.getenv('MOCK_LATENCY_MS', '200'))
+# Tiempo que el overlay sigue visible tras cada respuesta ajax (ms)
+MOCK_OVERLAY_MS = int(os.getenv('MOCK_OVERLAY_MS', '300'))
+MOCK_ROWS = int(os.getenv('MOCK_ROWS', '200'))
+MOCK_SESSION_TTL = int(os.getenv('MOCK_SESSION_TTL', '3600'))
+# Credenciales aceptadas; sin configurar se acepta cualquier usuario no vacío
+MOCK_USER = os.getenv('MOCK_USER')
+MOCK_PASS = os.getenv('MOCK_PASS')
+
+# Filas visibles por página de la tabla
+PAGE_SIZE = 20
+
+VIEWSTATE_ID = 'j_id1:javax.faces.ViewState:0'
+
+def _empresas(n):
+    rnd = random.Random(1)
+    ciudades = ['Madrid', 'Barcelona', 'Valencia', 'Sevilla', 'Bilbao']
+    return [{
+        'nombre': f"Cliente {i:04d} S.L.",
+        'tipo': rnd.choice(['Empresa', 'Autónomo']),
+        'cualificado': rnd.choice(['Sí', 'No']),
+        'ciudad': rnd.choice(ciudades),
+    } for i in range(n)]
+
+def _tareas(n, days_from, days_to):
+    rnd = random.Random(days_from)
+    today = datetime.now()
+    return [{
+        'asunto': f"Tarea {i:04d}",
+        'responsable': rnd.choice(['Ana', 'Luis', 'Marta', 'Jorge']),
+        'fecha': (today + timedelta(days=rnd.randint(days_from, days_to))).strftime('%d/%m/%Y'),
+        'estado': rnd.choice(['Pendiente', 'En curso']) if days_to >= 0 else 'Cerrada',
+    } for i in range(n)]
+
+# Vistas del CRM: columnas (campo, cabecera), columnas filtrables y datos
+VIEWS = {
+    '/crm/empresas.xhtml': {
+        'title': 'Empresas',
+        'columns': [('nombre', 'Nombre'), ('tipo', 'Tipo'), ('cualificado', 'Cualificado'), ('ciudad', 'Ciudad')],
+        'filters': ['nombre', 'tipo', 'cualificado'],
+        'rows': _empresas(MOCK_ROWS),
+    },
+    '/crm/tareas_actuales.xhtml': {
+        'title': 'Tareas actuales',
+        'columns': [('asunto', 'Asunto'), ('responsable', 'Responsable'), ('fecha', 'Fecha'), ('estado', 'Estado')],
+        'filters': ['asunto', 'responsable'],
+        'rows': _tareas(MOCK_ROWS, -7, 0),
+    },
+    '/crm/tareas_futuras.xhtml': {
+        'title': 'Tareas futuras',
+        'columns': [('asunto', 'Asunto'), ('responsable', 'Responsable'), ('fecha', 'Fecha prevista'), ('estado', 'Estado')],
+        'filters': ['asunto', 'responsable'],
+        'rows': _tareas(MOCK_ROWS, 1, 120),
+    },
+    '/crm/tareas_cerradas.xhtml': {
+        'title': 'Tareas cerradas',
+        'columns': [('asunto', 'Asunto'), ('responsable', 'Responsable'), ('fecha', 'Fecha cierre'), ('estado', 'Estado')],
+        'filters': ['asunto', 'responsable'],
+        'rows': _tareas(MOCK_ROWS * 3, -800, -1),
+        'date_filter': True,
+    },
+}
+
+_MENU = '''
+<ul class="ui-menu">
+  <li><a href="#" onclick="return toggleMenu('m-crm')">CRM</a>
+    <ul id="m-crm" hidden>
+      <li><a href="#" onclick="return toggleMenu('m-clientes')">Clientes</a>
+        <ul id="m-clientes" hidden><li><a href="/crm/empresas.xhtml">Empresas</a></li></ul></li>
+      <li><a href="#" onclick="return toggleMenu('m-tareas')">Tareas</a>
+        <ul id="m-tareas" hidden>
+          <li><a href="/crm/tareas_actuales.xhtml">Actuales</a></li>
+          <li><a href="/crm/tareas_futuras.xhtml">Futuras</a></li>
+          <li><a href="/crm/tareas_cerradas.xhtml">Cerradas</a></li>
+        </ul></li>
+    </ul></li>
+</ul>
+'''
+
+# Imitación mínima de PrimeFaces: cola ajax, overlay de bloqueo y respuestas parciales
+_CLIENT_JS = '''
+window.PrimeFaces = {ajax: {Queue: {pending: 0, isEmpty() { return this.pending === 0; }}}};
+
+function toggleMenu(id) {
+    const el = document.getElementById(id);
+    el.hidden = !el.hidden;
+    return false;
+}
+function showDialog(id) { document.getElementById(id).style.display = 'block'; }
+function hideDialog(id) { document.getElementById(id).style.display = 'none'; }
+function sleep(ms) { return new Promise(resolve => setTimeout(resolve, ms)); }
+
+async function jsfAjax(source) {
+    const queue = PrimeFaces.ajax.Queue;
+    queue.pending++;
+    document.getElementById('blocker').style.display = 'block';
+    try {
+        const data = new URLSearchParams(new FormData(document.getElementById('form')));
+        data.set('javax.faces.partial.ajax', 'true');
+        data.set('javax.faces.source', source);
+        const resp = await fetch(location.pathname, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+                'Faces-Request': 'partial/ajax',
+                'X-Requested-With': 'XMLHttpRequest',
+            },
+            body: data.toString(),
+        });
+        const xml = new DOMParser().parseFromString(await resp.text(), 'text/xml');
+        const redirect = xml.querySelector('redirect');
+        if (redirect) {
+            location.href = redirect.getAttribute('url');
+            return;
+        }
+        xml.querySelectorAll('update').forEach(update => {
+            const id = update.getAttribute('id');
+            if (id.includes('javax.faces.ViewState')) {
+                document.querySelector('input[name="javax.faces.ViewState"]').value = update.textContent;
+            } else {
+                document.getElementById(id).innerHTML = update.textContent;
+            }
+        });
+        xml.querySelectorAll('eval').forEach(e => new Function(e.textContent)());
+        await sleep(window.MOCK_OVERLAY_MS);
+    } finally {
+        document.getElementById('blocker').style.display = 'none';
+        queue.pending--;
+    }
+}
+
+const lastFilters = {};
+function filterChanged(input) {
+    if (lastFilters[input.name] === input.value) return;
+    lastFilters[input.name] = input.value;
+    jsfAjax('form:tabla');
+}
+document.addEventListener('keydown', e => {
+    if (e.key === 'Enter' && e.target.classList && e.target.classList.contains('ui-column-filter')) {
+        e.preventDefault();
+        filterChanged(e.target);
+    }
+});
+document.addEventListener('change', e => {
+    if (e.target.classList && e.target.classList.contains('ui-column-filter')) filterChanged(e.target);
+});
+'''
+
+_CSS = '''
+body { font-family: sans-serif; margin: 0; }
+.ui-menu { display: flex; gap: 1em; list-style: none; padding: 1em; background: #234; }
+.ui-menu a { color: #fff; } .ui-menu ul { list-style: none; padding-left: 1em; }
+.ui-blockui { display: none; position: fixed; inset: 0; background: rgba(0,0,0,.2); z-index: 1000; }
+.ui-dialog { display: none; position: fixed; top: 20%; left: 30%; background: #fff; border: 1px solid #999;
+             padding: 1em; z-index: 900; }
+table { border-collapse: collapse; } td, th { border: 1px solid #ccc; padding: 2px 6px; }
+'''
+
+def _page(title, body, viewstate=None, overlay_ms=MOCK_OVERLAY_MS):
+    viewstate_input = (f'<input type="hidden" name="javax.faces.ViewState" id="{VIEWSTATE_ID}" '
+                       f'value="{html.escape(viewstate)}" autocomplete="off" />') if viewstate else ''
+    return f'''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)} - BeyondUp</title>
+<style>{_CSS}</style>
+<script>window.MOCK_OVERLAY_MS = {overlay_ms};</script>
+<script>{_CLIENT_JS}</script></head>
+<body>
+<img src="/resources/logo.png" alt="BeyondUp" width="120" height="30">
+{_MENU}
+<form id="form" method="post" onsubmit="return false">
+{body}
+{viewstate_input}
+</form>
+<div id="blocker" class="ui-blockui"></div>
+</body></html>'''
+
+def _login_page(error=''):
+    return f'''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Login - BeyondUp</title></head>
+<body>
+<form id="formularioLogin" method="post" action="/login">
+  <input type="text" name="formularioLogin:username" placeholder="Usuario">
+  <input type="password" name="formularioLogin:password" placeholder="Contraseña">
+  <button type="submit">Entrar</button>
+  <p class="error">{html.escape(error)}</p>
+</form>
+</body></html>'''
+
+def _partial(updates=(), evals=()):
+    changes = ''.join(f'<update id="{uid}"><![CDATA[{content}]]></update>' for uid, content in updates)
+    changes += ''.join(f'<eval><![CDATA[{code}]]></eval>' for code in evals)
+    return f'<?xml version="1.0" encoding="UTF-8"?><partial-response id="j_id1"><changes>{changes}</changes></partial-response>'
+
+def _partial_error(name, message):
+    return (f'<?xml version="1.0" encoding="UTF-8"?><partial-response id="j_id1"><error>'
+            f'<error-name>{name}</error-name><error-message><![CDATA[{message}]]></error-message>'
+            f'</error></partial-response>')
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value.strip(), '%d/%m/%Y')
+    except ValueError:
+        return None
+
+class MockCRM:
+    """Estado del CRM simulado: sesiones, ViewStates, filtros por vista y exportaciones"""
+
+    def __init__(self, overlay_ms=MOCK_OVERLAY_MS):
+        self.overlay_ms = overlay_ms
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.exports = []
+        self.stats = {'requests': 0, 'ajax': 0, 'pages': 0}
+
+    def reset(self):
+        with self.lock:
+            self.sessions.clear()
+            self.exports.clear()
+            self.stats = {'requests': 0, 'ajax': 0, 'pages': 0}
+
+    def login(self, username, password):
+        if not username or not password:
+            return None
+        if MOCK_USER and (username != MOCK_USER or password != MOCK_PASS):
+            return None
+        sid = secrets.token_hex(16)
+        with self.lock:
+            self.sessions[sid] = {'user': username, 'expires': time.time() + MOCK_SESSION_TTL,
+                                  'viewstates': [], 'filters': {}}
+        return sid
+
+    def session(self, sid):
+        with self.lock:
+            session = self.sessions.get(sid)
+            if not session or session['expires'] < time.time():
+                self.sessions.pop(sid, None)
+                return None
+            session['expires'] = time.time() + MOCK_SESSION_TTL
+            return session
+
+    def new_viewstate(self, session):
+        viewstate = f"{len(session['viewstates'])}:{secrets.token_hex(8)}"
+        with self.lock:
+            session['viewstates'] = (session['viewstates'] + [viewstate])[-20:]
+        return viewstate
+
+    def filtered_rows(self, session, path):
+        view = VIEWS[path]
+        filters = session['filters'].get(path, {})
+        rows = view['rows']
+        for field in view['filters']:
+            value = filters.get(field, '').strip().lower()
+            if value:
+                rows = [r for r in rows if r[field].lower().startswith(value)]
+        if view.get('date_filter'):
+            start, end = _parse_date(filters.get('fecha_inicio', '')), _parse_date(filters.get('fecha_inicio_fin', ''))
+            if start:
+                rows = [r for r in rows if _parse_date(r['fecha']) >= start]
+            if end:
+                rows = [r for r in rows if _parse_date(r['fecha']) <= end]
+        return rows
+
+    def table_rows(self, session, path):
+        view = VIEWS[path]
+        rows = self.filtered_rows(session, path)[:PAGE_SIZE]
+        stamp = secrets.token_hex(4)
+        return ''.join(
+            f'<tr data-ri="{i}" data-render="{stamp}">'
+            + ''.join(f'<td>{html.escape(row[field])}</td>' for field, _ in view['columns'])
+            + '</tr>'
+            for i, row in enumerate(rows)
+        )
+
+    def view_page(self, session, path):
+        view = VIEWS[path]
+        headers = ''.join(
+            f'<th>{html.escape(label)}'
+            + (f'<br><input type="text" class="ui-column-filter" name="form:tabla:{field}:filter" '
+               f'placeholder="{html.escape(label)}" value="{html.escape(session["filters"].get(path, {}).get(field, ""))}">'
+               if field in view['filters'] else '')
+            + '</th>'
+            for field, label in view['columns']
+        )
+        toolbar = '<button type="button" id="form:btnExcel" title="Exportar a Excel" onclick="jsfAjax(\'form:btnExcel\')">' \
+                  '<i class="fa fa-file-excel"></i> Excel</button>'
+        dialogs = ''
+        if view.get('date_filter'):
+            toolbar += ' <button type="button" id="form:btnFiltro" title="Filtro" onclick="showDialog(\'dlgFiltro\')">Filtro</button>'
+            dialogs += '''
+<div id="dlgFiltro" class="ui-dialog">
+  <label>Desde <input type="text" name="form:fecha_inicio"></label>
+  <label>Hasta <input type="text" name="form:fecha_inicio_fin"></label>
+  <label>Fecha fin <input type="text" name="form:fecha_fin"></label>
+  <button type="button" id="form:btnFiltroAceptarTareas" onclick="jsfAjax('form:btnFiltroAceptarTareas')">Aceptar</button>
+</div>'''
+        dialogs += '''
+<div id="dlgExport" class="ui-dialog ui-confirm-dialog">
+  <p>El listado se enviará a su correo electrónico. ¿Desea continuar?</p>
+  <button type="button" class="ui-button ui-confirmdialog-yes" onclick="jsfAjax('form:btnConfirmarExport')">Aceptar</button>
+  <button type="button" class="ui-button ui-confirmdialog-no" onclick="hideDialog('dlgExport')">Cancelar</button>
+</div>
+<div id="growl"></div>'''
+        body = f'''
+<h1>{html.escape(view['title'])}</h1>
+<div class="ui-toolbar">{toolbar}</div>
+<div class="ui-datatable"><table>
+  <thead><tr>{headers}</tr></thead>
+  <tbody id="form:tabla_data" class="ui-datatable-data">{self.table_rows(session, path)}</tbody>
+</table></div>
+{dialogs}'''
+        return _page(view['title'], body, self.new_viewstate(session), self.overlay_ms)
+
+    def ajax(self, session, path, fields):
+        """Procesar un POST parcial JSF y devolver la partial-response"""
+        if fields.get('javax.faces.ViewState') not in session['viewstates']:
+            return _partial_error('javax.faces.application.ViewExpiredException', 'View could not be restored')
+
+        source = fields.get('javax.faces.source', '')
+        view = VIEWS[path]
+        filters = session['filters'].setdefault(path, {})
+        for field in view['filters']:
+            filters[field] = fields.get(f'form:tabla:{field}:filter', '')
+        updates, evals = [], []
+
+        if source == 'form:btnFiltroAceptarTareas':
+            for name in ('fecha_inicio', 'fecha_inicio_fin', 'fecha_fin'):
+                filters[name] = fields.get(f'form:{name}', '')
+            evals.append("hideDialog('dlgFiltro')")
+        if source in ('form:tabla', 'form:btnFiltroAceptarTareas'):
+            updates.append(('form:tabla_data', self.table_rows(session, path)))
+        elif source == 'form:btnExcel':
+            evals.append("showDialog('dlgExport')")
+        elif source == 'form:btnConfirmarExport':
+            export = {
+                'view': path.rsplit('/', 1)[-1].replace('.xhtml', ''),
+                'user': session['user'],
+                'filters': {k: v for k, v in filters.items() if v},
+                'rows': len(self.filtered_rows(session, path)),
+                'at': datetime.now().isoformat(timespec='seconds'),
+            }
+            with self.lock:
+                self.exports.append(export)
+            updates.append(('growl', 'Exportación en proceso: recibirá el fichero por correo'))
+            evals.append("hideDialog('dlgExport')")
+
+        updates.append((VIEWSTATE_ID, self.new_viewstate(session)))
+        return _partial(updates, evals)
+
+# PNG de 1x1 para el logo (ejercita el bloqueo de imágenes)
+_LOGO = bytes.fromhex(
+    '89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489'
+    '0000000d49444154789c6360f80f0000010101005b2e4ad90000000049454e44ae426082'
+)
+
+def make_handler(crm, latency_ms=MOCK_LATENCY_MS, verbose=False):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status, body, content_type='text/html; charset=utf-8', headers=None):
+            data = body if isinstance(body, bytes) else body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _redirect(self, location, headers=None):
+            self._send(302, b'', headers={'Location': location, **(headers or {})})
+
+        def _session(self):
+            for part in (self.headers.get('Cookie') or '').split(';'):
+                name, _, value = part.strip().partition('=')
+                if name == 'JSESSIONID':
+                    return crm.session(value)
+            return None
+
+        def _delay(self):
+            with crm.lock:
+                crm.stats['requests'] += 1
+            if latency_ms:
+                time.sleep(latency_ms / 1000)
+
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if path == '/__mock/exports':
+                return self._send(200, json.dumps(crm.exports, ensure_ascii=False), 'application/json')
+            if path == '/__mock/stats':
+                return self._send(200, json.dumps(crm.stats), 'application/json')
+            if path == '/resources/logo.png':
+                return self._send(200, _LOGO, 'image/png', {'Cache-Control': 'max-age=3600'})
+
+            self._delay()
+            session = self._session()
+            if path in ('/', '/login'):
+                return self._redirect('/home.xhtml') if session else self._send(200, _login_page())
+            if not session:
+                return self._redirect('/')
+            with crm.lock:
+                crm.stats['pages'] += 1
+            if path == '/home.xhtml':
+                return self._send(200, _page('Inicio', '<h1>Bienvenido</h1>', crm.new_viewstate(session), crm.overlay_ms))
+            if path in VIEWS:
+                return self._send(200, crm.view_page(session, path))
+            self._send(404, _page('No encontrado', '<h1>404</h1>'))
+
+        def do_POST(self):
+            path = urlsplit(self.path).path
+            length = int(self.headers.get('Content-Length') or 0)
+            fields = dict(parse_qsl(self.rfile.read(length).decode('utf-8'), keep_blank_values=True))
+            if path == '/__mock/reset':
+                crm.reset()
+                return self._send(200, '{}', 'application/json')
+
+            self._delay()
+            if path == '/login':
+                sid = crm.login(fields.get('formularioLogin:username'), fields.get('formularioLogin:password'))
+                if not sid:
+                    return self._send(200, _login_page('Usuario o contraseña incorrectos'))
+                return self._redirect('/home.xhtml', {'Set-Cookie': f'JSESSIONID={sid}; Path=/; HttpOnly'})
+
+            session = self._session()
+            partial = self.headers.get('Faces-Request') == 'partial/ajax'
+            if not session:
+                if partial:
+                    return self._send(200, '<?xml version="1.0" encoding="UTF-8"?>'
+                                           '<partial-response><redirect url="/"/></partial-response>', 'text/xml')
+                return self._redirect('/')
+            if path not in VIEWS or not partial:
+                return self._send(400, _page('Error', '<h1>Petición no soportada</h1>'))
+            with crm.lock:
+                crm.stats['ajax'] += 1
+            self._send(200, crm.ajax(session, path, fields), 'text/xml; charset=utf-8')
+
+        def log_message(self, format, *args):
+            if verbose:
+                print(f"   🧪 {self.address_string()} {format % args}")
+
+    return Handler
+
+def start_mock(host=MOCK_HOST, port=MOCK_PORT, latency_ms=MOCK_LATENCY_MS,
+               overlay_ms=MOCK_OVERLAY_MS, verbose=False):
+    """Arrancar el servidor en un hilo; devuelve (server, crm). Parar con server.shutdown()"""
+    crm = MockCRM(overlay_ms)
+    server = ThreadingHTTPServer((host, port), make_handler(crm, latency_ms, verbose))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, crm
+
+def main():
+    parser = argparse.ArgumentParser(description="CRM BeyondUp simulado")
+    parser.add_argument('--host', default=MOCK_HOST)
+    parser.add_argument('--port', type=int, default=MOCK_PORT)
+    parser.add_argument('--latency', type=int, default=MOCK_LATENCY_MS, help="Retardo por petición (ms)")
+    parser.add_argument('--overlay', type=int, default=MOCK_OVERLAY_MS, help="Overlay tras cada ajax (ms)")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    crm = MockCRM(args.overlay)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(crm, args.latency, args.verbose))
+    server.daemon_threads = True
+    print(f"🧪 CRM simulado en http://{args.host}:{args.port} "
+          f"(latencia {args.latency} ms, overlay {args.overlay} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️  Servidor detenido")
+    return True
+
+if __name__ == "__main__":
+    main()
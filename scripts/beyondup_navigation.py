@@ -0,0 +1,137 @@
+"""
+Navegación con caché de enlaces directos para el CRM BeyondUp
+La primera vez se recorre el menú (CRM > Tareas > Cerradas, ...) y se
+guarda la URL de la vista resultante; las siguientes ejecuciones van
+directamente a esa URL. Si el enlace directo deja de funcionar (login,
+redirección u otra vista) se descarta y se vuelve a recorrer el menú.
+"""
+
+from pathlib import Path
+import os
+import re
+
+from beyondup_common import read_json, write_json
+from beyondup_session import is_login_page
+from beyondup_selectors import click_element
+from beyondup_metrics import step
+from beyondup_timeouts import within
+from beyondup_guard import crm_action
+from beyondup_waits import wait_for_ajax
+
+NAV_CACHE_FILE = Path(os.getenv('NAV_CACHE_FILE', '/tmp/beyondup_nav_cache.json'))
+
+# Firma de la vista: cabeceras de la tabla principal, para comprobar que el
+# enlace directo lleva a la misma vista que el recorrido por el menú
+_SIGNATURE_JS = '''
+() => Array.from(document.querySelectorAll('th'))
+    .map(th => th.textContent.trim())
+    .filter(text => text)
+    .slice(0, 30)
+'''
+
+_cache = None
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        _cache = read_json(NAV_CACHE_FILE, {})
+    return _cache
+
+def _save_cache():
+    write_json(NAV_CACHE_FILE, _cache)
+
+def menu_selectors(label):
+    """Selectores candidatos para una entrada de menú"""
+    return [
+        f'text="{label}"',
+        f'a:has-text("{label}")',
+        f'span:has-text("{label}")',
+        f'a[href*="{label.lower()}"]',
+    ]
+
+def _strip_session(url):
+    """Quitar el ;jsessionid=... que el servidor añade a algunas URLs"""
+    return re.sub(r';jsessionid=[^?#]*', '', url, flags=re.I)
+
+def _same_url(a, b):
+    """Comparar URLs ignorando jsessionid y parámetros de la vista JSF"""
+    return a.split('?')[0].split(';')[0] == b.split('?')[0].split(';')[0]
+
+async def _view_signature(page):
+    try:
+        return await page.evaluate(_SIGNATURE_JS)
+    except Exception:
+        return []
+
+def direct_url(path):
+    """Enlace directo guardado de una ruta de menú, o None"""
+    entry = _load_cache().get(' > '.join(path))
+    return entry['url'] if entry else None
+
+async def _go_direct(page, entry, loaded=False):
+    """
+    Ir a la URL guardada y validar que es la vista esperada
+    loaded: la página acaba de cargarla (ensure_logged_in); no se recarga
+    """
+    try:
+        if not (loaded and _same_url(page.url, entry['url'])):
+            await page.goto(entry['url'])
+        await wait_for_ajax(page, fallback=2)
+        if await is_login_page(page) or not _same_url(page.url, entry['url']):
+            return False
+        return not entry.get('signature') or await _view_signature(page) == entry['signature']
+    except Exception as e:
+        print(f"   ⚠️  Enlace directo fallido: {str(e).splitlines()[0]}")
+        return False
+
+async def click_menu(page, label, timeout=5000):
+    """Pulsar una entrada de menú probando los selectores candidatos"""
+    try:
+        return await click_element(page, f"menu:{label}", menu_selectors(label), timeout=timeout)
+    except Exception:
+        raise Exception(f"Entrada de menú '{label}' no encontrada")
+
+async def walk_menu(page, path):
+    """Recorrer el menú pulsando cada entrada y esperando al CRM"""
+    for label in path:
+        selector = await click_menu(page, label)
+        print(f"   ✅ {label} encontrado: {selector}")
+        await wait_for_ajax(page, fallback=2)
+
+async def navigate(page, path, loaded=False):
+    """
+    Llegar a la vista indicada por la ruta de menú, p. ej. ['CRM', 'Tareas', 'Cerradas']
+    Usa el enlace directo guardado si existe; si no, recorre el menú y lo guarda
+    loaded: la página ya cargó el enlace directo (primer intento de un trabajo del motor)
+    Devuelve True si se llegó por enlace directo
+    """
+    async with crm_action('navigate'):
+        with step('navigate', view=' > '.join(path)) as record:
+            record['direct'] = await _navigate(page, path, record, loaded)
+            return record['direct']
+
+async def _navigate(page, path, record, loaded=False):
+    cache = _load_cache()
+    key = ' > '.join(path)
+
+    entry = cache.get(key)
+    if entry:
+        # Solo el enlace directo tiene el tiempo aprendido; el recorrido del menú no
+        if await within(record, _go_direct(page, entry, loaded)):
+            print(f"   ⚡ {key}: enlace directo")
+            return True
+        print(f"   ⚠️  {key}: el enlace directo ya no es válido, recorriendo el menú")
+        cache.pop(key, None)
+        _save_cache()
+
+    start_url = page.url
+    print(f"   📂 {key}: recorriendo el menú...")
+    await walk_menu(page, path)
+
+    # Las navegaciones JSF por POST mantienen la URL anterior: entonces no
+    # hay enlace directo que guardar
+    if not _same_url(page.url, start_url):
+        cache[key] = {'url': _strip_session(page.url), 'signature': await _view_signature(page)}
+        _save_cache()
+        print(f"   💾 {key}: enlace directo guardado")
+    return False
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Cola de trabajos compartida (SQLite) para varias réplicas del CRM BeyondUp
+Cada réplica en modo worker toma trabajos con una concesión (lease) de
+QUEUE_LEASE_SECONDS que renueva con latidos mientras el trabajo corre. Si
+una réplica muere o se cuelga, su concesión caduca y el trabajo vuelve a la
+cola para otra (hasta QUEUE_MAX_ATTEMPTS intentos). Al parar una réplica
+(SIGTERM) sus trabajos en curso se devuelven a la cola sin gastar intento.
+
+QUEUE_FILE debe estar en un volumen compartido por las réplicas (p. ej.
+./logs); con LEDGER_FILE también compartido, un trabajo que se repite tras
+caducar su concesión no reenvía las exportaciones ya confirmadas.
+
+Uso:
+    python3 beyondup_queue.py enqueue tareas_actuales tareas_futuras
+    python3 beyondup_queue.py enqueue --all
+    python3 beyondup_queue.py enqueue tareas_cerradas_q0 --quarters=0,-1,-2
+    python3 beyondup_queue.py worker --concurrency 3
+    python3 beyondup_queue.py status
+"""
+
+from datetime import datetime
+from pathlib import Path
+import threading
+import argparse
+import asyncio
+import sqlite3
+import signal
+import socket
+import json
+import uuid
+import time
+import sys
+import os
+
+QUEUE_FILE = Path(os.getenv('QUEUE_FILE', '/tmp/beyondup_queue.sqlite3'))
+QUEUE_LEASE_SECONDS = float(os.getenv('QUEUE_LEASE_SECONDS', '120'))
+# Latido: renovar la concesión varias veces antes de que caduque
+QUEUE_HEARTBEAT_SECONDS = float(os.getenv('QUEUE_HEARTBEAT_SECONDS', str(QUEUE_LEASE_SECONDS / 4)))
+QUEUE_MAX_ATTEMPTS = int(os.getenv('QUEUE_MAX_ATTEMPTS', '3'))
+QUEUE_POLL_SECONDS = float(os.getenv('QUEUE_POLL_SECONDS', '5'))
+WORKER_ID = os.getenv('WORKER_ID', f"{socket.gethostname()}:{os.getpid()}")
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    report TEXT NOT NULL,
+    ranges TEXT,
+    force INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    owner TEXT,
+    lease_expires REAL,
+    error TEXT,
+    result TEXT,
+    enqueued_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, enqueued_at);
+'''
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+class JobQueue:
+    """
+    Cola con concesiones sobre un archivo SQLite (WAL, transacciones IMMEDIATE)
+    Todas las operaciones son atómicas entre procesos y réplicas; son
+    bloqueantes (hasta 30 s con la base ocupada), así que el worker las
+    lanza con asyncio.to_thread, y un cerrojo serializa la conexión compartida
+    """
+
+    def __init__(self, path=QUEUE_FILE):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _transaction(self, fn):
+        with self._lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                value = fn()
+                self.db.execute('COMMIT')
+                return value
+            except BaseException:
+                self.db.execute('ROLLBACK')
+                raise
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self.db.execute(sql, params)
+
+    def enqueue(self, report, ranges=None, force=False, max_attempts=QUEUE_MAX_ATTEMPTS):
+        job_id = uuid.uuid4().hex[:12]
+        self._execute(
+            'INSERT INTO jobs (id, report, ranges, force, status, max_attempts, enqueued_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (job_id, report, json.dumps(ranges) if ranges else None, int(force), 'queued', max_attempts, _now()))
+        return job_id
+
+    def _requeue_expired(self):
+        """Devolver a la cola los trabajos cuya concesión caducó (o darlos por fallidos)"""
+        expired = self.db.execute(
+            "SELECT id, report, owner, attempts, max_attempts FROM jobs WHERE status = 'leased' AND lease_expires < ?",
+            (time.time(),)).fetchall()
+        for job in expired:
+            status = 'failed' if job['attempts'] >= job['max_attempts'] else 'queued'
+            self.db.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, lease_expires = NULL, error = ?, "
+                "finished_at = CASE WHEN ? = 'failed' THEN ? END WHERE id = ?",
+                (status, f"Concesión caducada en {job['owner']}", status, _now(), job['id']))
+            print(f"   ⌛ {job['report']} ({job['id']}): concesión de {job['owner']} caducada, "
+                  f"{'de vuelta a la cola' if status == 'queued' else 'sin más intentos'}")
+
+    def lease(self, owner, seconds=QUEUE_LEASE_SECONDS):
+        """Tomar el trabajo en cola más antiguo; devuelve el trabajo (dict) o None"""
+        def take():
+            self._requeue_expired()
+            job = self.db.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY enqueued_at, rowid LIMIT 1").fetchone()
+            if not job:
+                return None
+            expires = time.time() + seconds
+            self.db.execute(
+                "UPDATE jobs SET status = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                "started_at = ? WHERE id = ?", (owner, expires, _now(), job['id']))
+            job = dict(job, status='leased', owner=owner, lease_expires=expires)
+            # Los rangos se usan como claves en el registro: tuplas, no listas
+            job['ranges'] = [tuple(r) for r in json.loads(job['ranges'])] if job['ranges'] else None
+            job['force'] = bool(job['force'])
+            job['attempts'] += 1
+            return job
+        return self._transaction(take)
+
+    def heartbeat(self, job_id, owner, seconds=QUEUE_LEASE_SECONDS):
+        """Renovar la concesión; False si ya no es nuestra"""
+        cursor = self._execute(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND owner = ? AND status = 'leased'",
+            (time.time() + seconds, job_id, owner))
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, owner, result):
+        """Guardar el resultado; False si la concesión se había perdido"""
+        cursor = self._execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, owner = NULL, lease_expires = NULL, "
+            "finished_at = ? WHERE id = ? AND owner = ? AND status = 'leased'",
+            ('done' if result['ok'] else 'failed', json.dumps(result, ensure_ascii=False),
+             result.get('error'), _now(), job_id, owner))
+        return cursor.rowcount == 1
+
+    def release(self, job_id, owner):
+        """Devolver un trabajo a la cola sin gastar intento (parada ordenada)"""
+        self._execute(
+            "UPDATE jobs SET status = 'queued', owner = NULL, lease_expires = NULL, attempts = attempts - 1 "
+            "WHERE id = ? AND owner = ? AND status = 'leased'", (job_id, owner))
+
+    def counts(self):
+        with self._lock:
+            return {row['status']: row['n'] for row in
+                    self.db.execute('SELECT status, COUNT(*) AS n FROM jobs GROUP BY status')}
+
+    def recent(self, limit=20):
+        with self._lock:
+            return [dict(row) for row in self.db.execute(
+                'SELECT id, report, status, attempts, owner, error, enqueued_at, finished_at '
+                'FROM jobs ORDER BY enqueued_at DESC, rowid DESC LIMIT ?', (limit,))]
+
+async def _heartbeat(queue, job, owner, task):
+    """Renovar la concesión mientras corre el trabajo; si se pierde, cancelarlo"""
+    while True:
+        await asyncio.sleep(QUEUE_HEARTBEAT_SECONDS)
+        try:
+            alive = await asyncio.to_thread(queue.heartbeat, job['id'], owner)
+        except sqlite3.Error as e:
+            print(f"   ⚠️  Latido fallido de {job['report']} ({job['id']}): {str(e)}")
+            continue
+        if not alive:
+            print(f"   ⚠️  {job['report']} ({job['id']}): concesión perdida, se abandona")
+            task.cancel()
+            return
+
+async def _run_leased(manager, queue, job, owner):
+    """Ejecutar un trabajo con su latido y guardar el resultado en la cola"""
+    labels = ', '.join(label for _, _, label in job['ranges'] or [])
+    print(f"📥 {job['report']} ({job['id']}, intento {job['attempts']}/{job['max_attempts']})"
+          + (f" [{labels}]" if labels else ""))
+    task = asyncio.current_task()
+    beat = asyncio.create_task(_heartbeat(queue, job, owner, task))
+    try:
+        try:
+            engine = await manager.ensure_engine()
+            result = await engine.run_job(job['report'], ranges=job['ranges'], force=job['force'])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            result = {'ok': False, 'seconds': 0.0, 'error': str(e)}
+    except asyncio.CancelledError:
+        # Parada de la réplica (o concesión perdida, en cuyo caso no hace nada)
+        await asyncio.to_thread(queue.release, job['id'], owner)
+        raise
+    finally:
+        beat.cancel()
+    if not await asyncio.to_thread(queue.complete, job['id'], owner, result):
+        print(f"   ⚠️  {job['report']} ({job['id']}): resultado descartado, la concesión ya no era nuestra")
+
+async def work(concurrency, owner=WORKER_ID):
+    """Bucle de una réplica: tomar trabajos mientras haya hueco hasta recibir SIGTERM/SIGINT"""
+    from beyondup_daemon import JobManager
+
+    queue = JobQueue()
+    manager = JobManager(concurrency)
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    stopping = asyncio.create_task(stop.wait())
+    tasks = set()
+    print(f"👷 Worker {owner}: {concurrency} trabajos a la vez, cola {QUEUE_FILE}")
+
+    try:
+        while not stop.is_set():
+            # Con AIMD el motor decide cuántos trabajos caben en cada momento
+            while len(tasks) < (manager.engine.capacity() if manager.engine else concurrency):
+                try:
+                    job = await asyncio.to_thread(queue.lease, owner)
+                except sqlite3.Error as e:
+                    print(f"   ⚠️  No se pudo leer la cola: {str(e)}")
+                    job = None
+                if not job:
+                    break
+                tasks.add(asyncio.create_task(_run_leased(manager, queue, job, owner)))
+            done, _ = await asyncio.wait(tasks | {stopping}, timeout=QUEUE_POLL_SECONDS,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            tasks -= done
+    finally:
+        print(f"\n⏹️  Deteniendo worker {owner} ({len(tasks)} trabajos devueltos a la cola)...")
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        stopping.cancel()
+        await manager.shutdown()
+
+def main():
+    from beyondup_common import MAX_CONCURRENCY
+    from beyondup_reports import REPORTS
+    from beyondup_flow import resolve_ranges
+
+    parser = argparse.ArgumentParser(description="Cola de trabajos BeyondUp compartida entre réplicas")
+    sub = parser.add_subparsers(dest='command', required=True)
+    enqueue_parser = sub.add_parser('enqueue', help="Encolar reportes")
+    enqueue_parser.add_argument('reports', nargs='*', metavar='REPORTE')
+    enqueue_parser.add_argument('--all', action='store_true', help="Encolar todos los reportes")
+    enqueue_parser.add_argument('--quarters', default='', help="Trimestres, p. ej. --quarters=0,-1,-2")
+    enqueue_parser.add_argument('--range', action='append', default=[], metavar='INICIO:FIN')
+    enqueue_parser.add_argument('--force', action='store_true', help="Exportar aunque ya se hiciera hace poco")
+    worker_parser = sub.add_parser('worker', help="Ejecutar trabajos de la cola")
+    worker_parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENCY)
+    status_parser = sub.add_parser('status', help="Estado de la cola")
+    status_parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        from beyondup_common import check_credentials
+        check_credentials()
+        asyncio.run(work(max(1, args.concurrency)))
+        return True
+
+    queue = JobQueue()
+    if args.command == 'status':
+        for job in reversed(queue.recent(args.limit)):
+            print(f"   {job['enqueued_at']} {job['id']} {job['report']:<28} {job['status']:<7} "
+                  f"{job['attempts']} {job['owner'] or ''}")
+            if job['error'] and job['status'] != 'done':
+                print(f"      💥 {job['error'].splitlines()[0]}")
+        print(f"\n📊 {queue.counts()}")
+        return True
+
+    names = list(REPORTS) if args.all else list(dict.fromkeys(args.reports))
+    if not names:
+        enqueue_parser.error("indica reportes o --all")
+    unknown = [name for name in names if name not in REPORTS]
+    if unknown:
+        enqueue_parser.error(f"reportes desconocidos: {', '.join(unknown)}")
+    try:
+        ranges = resolve_ranges([q for q in args.quarters.split(',') if q.strip()], args.range) or None
+    except ValueError as e:
+        enqueue_parser.error(str(e))
+    if ranges and any(not REPORTS[name]['dates'] for name in names):
+        enqueue_parser.error("--quarters/--range solo valen para reportes con fechas")
+    for name in names:
+        print(f"📨 {name} en cola ({queue.enqueue(name, ranges, args.force)})")
+    return True
+
+if __name__ == "__main__":
+    try:
+        sys.exit(0 if main() else 1)
+    except KeyboardInterrupt:
+        print("\n\n⏸️  Proceso interrumpido por el usuario")
+        sys.exit(130)
@@ -0,0 +1,100 @@
+"""
+Definiciones de los reportes del CRM BeyondUp
+Cada reporte es un diccionario: vista del menú, filtros por columna, rango
+de fechas y botones de exportación. Los ejecuta beyondup_flow.run(); para
+añadir un reporte basta con añadir una entrada aquí o en REPORTS_FILE (JSON
+con el mismo formato), sin escribir otro script.
+
+    'view'      ruta del menú, p. ej. ['CRM', 'Tareas', 'Cerradas']
+    'filters'   {placeholder de la columna: valor}
+    'dates'     {'quarter': desplazamiento} (0 actual, -1 anterior...),
+                {'quarters': [0, -1, ...]} o {'ranges': ['01/01/2024:31/03/2024']};
+                con varios rangos se exportan todos desde la misma vista
+    'zoom'      zoom de la página antes de filtrar (columnas ocultas)
+    'export'    elemento del botón de exportación (beyondup_selectors)
+    'confirm'   elemento del Aceptar de la confirmación
+"""
+
+from pathlib import Path
+import os
+
+from beyondup_common import read_json
+
+REPORTS_FILE = Path(os.getenv('REPORTS_FILE', str(Path(__file__).with_name('reports.json'))))
+
+DEFAULTS = {
+    'filters': {},
+    'dates': None,
+    'zoom': None,
+    'export': 'excel',
+    'confirm': 'aceptar_exportacion',
+}
+
+# Reportes incluidos, en el orden de ejecución por defecto
+BUILTIN_REPORTS = {
+    'tareas_actuales': {
+        'title': 'Tareas Actuales',
+        'view': ['CRM', 'Tareas', 'Actuales'],
+    },
+    'tareas_futuras': {
+        'title': 'Tareas Futuras',
+        'view': ['CRM', 'Tareas', 'Futuras'],
+    },
+    'tareas_cerradas_q0': {
+        'title': 'Tareas Cerradas - trimestre actual',
+        'view': ['CRM', 'Tareas', 'Cerradas'],
+        'dates': {'quarter': 0},
+        # En las vistas de tareas cerradas el primer Aceptar es el del diálogo de filtro
+        'confirm': 'aceptar_exportacion_cerradas',
+    },
+    'tareas_cerradas_q1': {
+        'title': 'Tareas Cerradas - trimestre anterior (Q-1)',
+        'view': ['CRM', 'Tareas', 'Cerradas'],
+        'dates': {'quarter': -1},
+        'confirm': 'aceptar_exportacion_cerradas',
+    },
+    'tareas_cerradas_q2': {
+        'title': 'Tareas Cerradas - hace dos trimestres (Q-2)',
+        'view': ['CRM', 'Tareas', 'Cerradas'],
+        'dates': {'quarter': -2},
+        'confirm': 'aceptar_exportacion_cerradas',
+    },
+    'empresas_cualificadas': {
+        'title': 'Empresas Cualificadas',
+        'view': ['CRM', 'Clientes', 'Empresas'],
+        # Con el zoom al 80% la columna Cualificado queda visible
+        'zoom': 0.8,
+        'filters': {'Cualificado': 'Sí'},
+    },
+    'empresas_no_cualificadas': {
+        'title': 'Empresas No Cualificadas',
+        'view': ['CRM', 'Clientes', 'Empresas'],
+        'zoom': 0.8,
+        'filters': {'Cualificado': 'No', 'Tipo': 'Empresa'},
+    },
+    'autonomos_no_cualificados': {
+        'title': 'Autónomos No Cualificados',
+        'view': ['CRM', 'Clientes', 'Empresas'],
+        'zoom': 0.8,
+        'filters': {'Cualificado': 'No', 'Tipo': 'Autónomo'},
+    },
+}
+
+def _load_reports():
+    """Reportes incluidos más los de REPORTS_FILE (que pueden sustituirlos)"""
+    reports = dict(BUILTIN_REPORTS)
+    for name, definition in read_json(REPORTS_FILE, {}).items():
+        if not isinstance(definition, dict) or not isinstance(definition.get('view'), list):
+            print(f"   ⚠️  {REPORTS_FILE}: el reporte '{name}' no tiene 'view'; se ignora")
+            continue
+        reports[name] = definition
+    return {name: {**DEFAULTS, 'title': name, **definition} for name, definition in reports.items()}
+
+REPORTS = _load_reports()
+
+def get_report(name):
+    """Definición completa (con valores por defecto) de un reporte"""
+    try:
+        return REPORTS[name]
+    except KeyError:
+        raise KeyError(f"Reporte desconocido: {name}") from None
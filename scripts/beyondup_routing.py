@@ -0,0 +1,140 @@
+"""
+Perfil de enrutado de peticiones para las ejecuciones de reportes
+Los flujos solo necesitan el DOM para pulsar y filtrar: con el perfil 'lean'
+se abortan imágenes, media, fuentes y peticiones a dominios de terceros o de
+analítica, salvo los recursos JSF/PrimeFaces de la lista blanca.
+
+    ROUTE_PROFILE=off      sin interceptar ni medir
+    ROUTE_PROFILE=measure  no bloquea nada, pero mide lo que 'lean' bloquearía
+    ROUTE_PROFILE=lean     bloquea (por defecto)
+
+Las estadísticas se agrupan por paso: cada screenshot cierra el paso en curso.
+"""
+
+from urllib.parse import urlsplit
+import weakref
+import time
+import os
+import re
+
+ROUTE_PROFILE = os.getenv('ROUTE_PROFILE', 'lean').lower()
+
+# Tipos de recurso que no hacen falta para manejar la interfaz
+BLOCKED_TYPES = {'image', 'media', 'font'}
+
+# Recursos que nunca se bloquean (regex sobre la URL, separadas por comas)
+ROUTE_ALLOW = [re.compile(p) for p in os.getenv(
+    'ROUTE_ALLOW', r'javax\.faces\.resource,/primefaces,jsf\.js'
+).split(',') if p]
+
+# Dominios de analítica y terceros que se bloquean siempre
+ROUTE_BLOCK_HOSTS = [h for h in os.getenv(
+    'ROUTE_BLOCK_HOSTS',
+    'google-analytics.com,googletagmanager.com,doubleclick.net,hotjar.com,facebook.net,clarity.ms'
+).split(',') if h]
+
+# Dominios propios: los de cada documento que carga el navegador
+_first_party = set()
+_stats = weakref.WeakKeyDictionary()
+
+def _base_domain(host):
+    return '.'.join(host.split('.')[-2:])
+
+def classify(request):
+    """Motivo por el que se bloquearía la petición, o None si hay que dejarla pasar"""
+    host = urlsplit(request.url).hostname or ''
+    if request.resource_type == 'document':
+        _first_party.add(_base_domain(host))
+        return None
+    if any(p.search(request.url) for p in ROUTE_ALLOW):
+        return None
+    if any(host == h or host.endswith('.' + h) for h in ROUTE_BLOCK_HOSTS):
+        return 'analytics'
+    if request.resource_type in BLOCKED_TYPES:
+        return request.resource_type
+    if host and _base_domain(host) not in _first_party:
+        return 'third_party'
+    return None
+
+class RouteStats:
+    """Peticiones y bytes por paso de una página"""
+
+    def __init__(self):
+        self.steps = []
+        self._new_step()
+
+    def _new_step(self):
+        self.current = {'requests': 0, 'bytes': 0, 'blocked': 0, 'blocked_bytes': 0, 'by_reason': {}}
+        self.started = time.monotonic()
+
+    def add_blocked(self, reason, size=0):
+        self.current['blocked'] += 1
+        self.current['blocked_bytes'] += size
+        self.current['by_reason'][reason] = self.current['by_reason'].get(reason, 0) + 1
+
+    def add_response(self, response):
+        size = int(response.headers.get('content-length') or 0)
+        reason = classify(response.request)
+        if reason:
+            # Solo llega aquí con ROUTE_PROFILE=measure: lo que 'lean' se ahorraría
+            self.add_blocked(reason, size)
+        else:
+            self.current['requests'] += 1
+            self.current['bytes'] += size
+
+    def close_step(self, name):
+        self.steps.append({'step': name, 'seconds': round(time.monotonic() - self.started, 2), **self.current})
+        self._new_step()
+
+    def totals(self):
+        totals = {'requests': 0, 'bytes': 0, 'blocked': 0, 'blocked_bytes': 0, 'by_reason': {}}
+        for step in self.steps + [self.current]:
+            for key in ('requests', 'bytes', 'blocked', 'blocked_bytes'):
+                totals[key] += step[key]
+            for reason, count in step['by_reason'].items():
+                totals['by_reason'][reason] = totals['by_reason'].get(reason, 0) + count
+        return totals
+
+async def apply_route_profile(page):
+    """Instalar el perfil ROUTE_PROFILE y la medición en una página nueva"""
+    if ROUTE_PROFILE == 'off':
+        return None
+
+    stats = _stats[page] = RouteStats()
+    page.on('response', stats.add_response)
+
+    if ROUTE_PROFILE == 'lean':
+        async def handler(route):
+            reason = classify(route.request)
+            if reason:
+                stats.add_blocked(reason)
+                await route.abort('blockedbyclient')
+            else:
+                await route.continue_()
+        await page.route('**/*', handler)
+    return stats
+
+def close_step(page, name):
+    """Cerrar el paso en curso de la página (se llama al guardar cada screenshot)"""
+    stats = _stats.get(page)
+    if stats:
+        stats.close_step(name)
+
+def route_report(page):
+    """Resumen de red de la página: perfil, totales y desglose por paso"""
+    stats = _stats.get(page)
+    if not stats:
+        return None
+    return {'profile': ROUTE_PROFILE, 'totals': stats.totals(), 'steps': stats.steps}
+
+def format_report(report):
+    """Línea de log con los totales de red de un trabajo"""
+    totals = report['totals']
+    reasons = ', '.join(f"{r} {n}" for r, n in sorted(totals['by_reason'].items()))
+    line = (f"{totals['requests']} peticiones, {totals['bytes'] / 1048576:.1f} MB; "
+            f"{'bloqueadas' if report['profile'] == 'lean' else 'bloqueables'} {totals['blocked']}")
+    if reasons:
+        line += f" ({reasons})"
+    if totals['blocked_bytes']:
+        line += f", {totals['blocked_bytes'] / 1048576:.1f} MB"
+    return line
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Planificador de reportes dentro del demonio del CRM BeyondUp
+Cada entrada de SCHEDULE_FILE lanza un reporte con una expresión cron de
+cinco campos (minuto hora día mes día_semana) sobre el navegador caliente
+del demonio: un reporte planificado cuesta una página más, no otro Chromium.
+
+    {
+      "actuales_laborables": {"report": "tareas_actuales", "cron": "0 7 * * 1-5", "jitter": 120},
+      "tareas_cerradas_q0": {"cron": "30 6 * * *", "max_concurrent": 1}
+    }
+
+- Campos: *, listas, rangos y pasos (*/15, 1-5/2); como en vixie cron,
+  'n/paso' va de n al máximo del campo (5/10 = 5,15,25...)
+- jitter: retardo aleatorio (s) al arrancar, para no lanzar todo a la vez
+- max_concurrent: trabajos del mismo reporte en cola o en curso (por defecto 1)
+- SCHEDULE_MAX_CONCURRENCY: trabajos planificados en curso entre todos
+- Las ejecuciones que se solapan o que se perdieron (demonio parado) se
+  agrupan en una sola; con "coalesce": false las perdidas se descartan
+
+Uso:
+    python3 beyondup_scheduler.py                  # próximas ejecuciones
+    python3 beyondup_scheduler.py "0 7 * * 1-5"    # probar una expresión
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import asyncio
+import random
+import sys
+import os
+
+from beyondup_common import MAX_CONCURRENCY, read_json, write_json
+
+SCHEDULE_FILE = Path(os.getenv('SCHEDULE_FILE', str(Path(__file__).with_name('schedule.json'))))
+# Última ejecución de cada entrada, para detectar las perdidas tras un reinicio
+SCHEDULE_STATE_FILE = Path(os.getenv('SCHEDULE_STATE_FILE', '/tmp/beyondup_schedule_state.json'))
+SCHEDULE_JITTER = float(os.getenv('SCHEDULE_JITTER', '30'))
+SCHEDULE_MAX_CONCURRENCY = int(os.getenv('SCHEDULE_MAX_CONCURRENCY', str(MAX_CONCURRENCY)))
+
+# (mínimo, máximo) de cada campo cron; el domingo es 0 o 7
+_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+def _parse_field(text, low, high):
+    values = set()
+    for part in text.split(','):
+        base, slash, step = part.partition('/')
+        step = int(step) if slash else 1
+        if step < 1:
+            raise ValueError(f"Paso no válido en '{text}'")
+        if base == '*':
+            start, end = low, high
+        elif '-' in base:
+            start, end = (int(v) for v in base.split('-', 1))
+        else:
+            # 'n/paso' sigue hasta el máximo del campo (vixie cron); 'n' solo es n
+            start = int(base)
+            end = high if slash else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"Valor fuera de rango en '{text}' ({low}-{high})")
+        values.update(range(start, end + 1, step))
+    return values
+
+class CronExpression:
+    """Expresión cron de cinco campos con *, listas, rangos y pasos"""
+
+    def __init__(self, text):
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError(f"La expresión cron debe tener 5 campos: '{text}'")
+        self.text = text
+        try:
+            self.minutes, self.hours, self.days, self.months, self.weekdays = (
+                _parse_field(field, low, high) for field, (low, high) in zip(fields, _FIELDS))
+        except ValueError as e:
+            raise ValueError(f"Expresión cron no válida '{text}': {e}") from None
+        self.weekdays = {day % 7 for day in self.weekdays}
+        # Como en cron: si se restringen día del mes y día de la semana, basta con uno
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def _day_matches(self, dt):
+        day = dt.day in self.days
+        weekday = (dt.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, dt):
+        """Primer instante (al minuto) estrictamente posterior a dt que cumple la expresión"""
+        dt = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+        raise ValueError(f"La expresión cron '{self.text}' no se cumple nunca")
+
+def load_schedule(path=SCHEDULE_FILE):
+    """Entradas válidas de SCHEDULE_FILE; las incorrectas se avisan y se ignoran"""
+    from beyondup_reports import REPORTS
+    from beyondup_flow import resolve_ranges
+
+    entries = {}
+    for name, entry in (read_json(path, {}) or {}).items():
+        try:
+            report = entry.get('report', name)
+            if report not in REPORTS:
+                raise ValueError(f"reporte desconocido '{report}'")
+            entries[name] = {
+                'report': report,
+                'cron': CronExpression(entry['cron']),
+                'jitter': float(entry.get('jitter', SCHEDULE_JITTER)),
+                'max_concurrent': max(1, int(entry.get('max_concurrent', 1))),
+                'coalesce': bool(entry.get('coalesce', True)),
+                'ranges': resolve_ranges(entry.get('quarters', []), entry.get('ranges', [])) or None,
+            }
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            print(f"   ⚠️  {path}: entrada '{name}' ignorada ({str(e)})")
+    return entries
+
+class Scheduler:
+    """
+    Lanza las entradas del plan como trabajos del JobManager del demonio
+    Una entrada vencida queda pendiente (con su jitter) hasta que los límites
+    lo permiten; los vencimientos que llegan mientras tanto se agrupan
+    """
+
+    def __init__(self, manager, entries, max_concurrency=SCHEDULE_MAX_CONCURRENCY):
+        self.manager = manager
+        self.entries = entries
+        self.max_concurrency = max(1, max_concurrency)
+        self.state = read_json(SCHEDULE_STATE_FILE, {})
+        now = datetime.now()
+
+        for name, entry in entries.items():
+            entry.update({'due_at': None, 'coalesced': 0, 'job_ids': [], 'last_run': self.state.get(name)})
+            last_run = datetime.fromisoformat(entry['last_run']) if entry['last_run'] else None
+            entry['next_run'] = entry['cron'].next_after(last_run or now)
+            if entry['next_run'] <= now:
+                # Ejecuciones perdidas mientras el demonio estaba parado
+                missed = 0
+                while entry['next_run'] <= now and missed < 1000:
+                    missed += 1
+                    entry['next_run'] = entry['cron'].next_after(entry['next_run'])
+                if entry['coalesce']:
+                    print(f"   ⏰ {name}: {missed} ejecuciones perdidas, se lanza una")
+                    self._make_due(entry, now)
+                    entry['coalesced'] += missed - 1
+                else:
+                    print(f"   ⏰ {name}: {missed} ejecuciones perdidas descartadas")
+
+    def _make_due(self, entry, when):
+        entry['due_at'] = when + timedelta(seconds=random.uniform(0, entry['jitter']))
+
+    def _active(self):
+        """Trabajos planificados en cola o en curso entre todas las entradas"""
+        count = 0
+        for e in self.entries.values():
+            e['job_ids'] = [job_id for job_id in e['job_ids']
+                            if job_id in self.manager.jobs and not self.manager.jobs[job_id]['finished_at']]
+            count += len(e['job_ids'])
+        return count
+
+    def _report_active(self, report):
+        """Trabajos del reporte en cola o en curso, vengan del plan o de la API"""
+        return sum(1 for job in self.manager.jobs.values()
+                   if job['report'] == report and not job['finished_at'])
+
+    async def tick(self, now=None):
+        """Marcar las entradas vencidas y lanzar las pendientes que quepan"""
+        now = now or datetime.now()
+        for name, entry in self.entries.items():
+            if entry['next_run'] <= now:
+                if entry['due_at']:
+                    entry['coalesced'] += 1
+                    print(f"   🔗 {name}: ejecución agrupada con la pendiente")
+                else:
+                    self._make_due(entry, entry['next_run'])
+                entry['next_run'] = entry['cron'].next_after(now)
+
+        # Las pendientes más antiguas primero, para que ninguna se quede esperando
+        due = sorted((entry['due_at'], name) for name, entry in self.entries.items()
+                     if entry['due_at'] and entry['due_at'] <= now)
+        for _, name in due:
+            entry = self.entries[name]
+            if self._active() >= self.max_concurrency:
+                break
+            if self._report_active(entry['report']) >= entry['max_concurrent']:
+                # Sigue pendiente: se lanzará cuando termine el que está en marcha
+                continue
+            job = await self.manager.submit(entry['report'], entry['ranges'], source=f"schedule:{name}")
+            print(f"   ⏰ {name}: {entry['report']} lanzado (trabajo {job['id']})")
+            entry['job_ids'].append(job['id'])
+            entry['due_at'] = None
+            entry['last_run'] = self.state[name] = now.isoformat(timespec='seconds')
+            write_json(SCHEDULE_STATE_FILE, self.state)
+
+    async def run(self, interval=1.0):
+        """Bucle del planificador (hasta que se cancele la tarea)"""
+        print(f"⏰ Planificador: {len(self.entries)} entradas, máximo {self.max_concurrency} a la vez")
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                print(f"   ⚠️  Error en el planificador: {str(e)}")
+            await asyncio.sleep(interval)
+
+    def status(self):
+        return {name: {
+            'report': entry['report'],
+            'cron': entry['cron'].text,
+            'next_run': entry['next_run'].isoformat(timespec='seconds'),
+            'due_at': entry['due_at'].isoformat(timespec='seconds') if entry['due_at'] else None,
+            'last_run': entry['last_run'],
+            'coalesced': entry['coalesced'],
+            'active': len(entry['job_ids']),
+        } for name, entry in self.entries.items()}
+
+def main():
+    now = datetime.now()
+    if len(sys.argv) > 1:
+        cron = CronExpression(' '.join(sys.argv[1:]))
+        when = now
+        for _ in range(5):
+            when = cron.next_after(when)
+            print(when.strftime('%a %d/%m/%Y %H:%M'))
+        return True
+
+    entries = load_schedule()
+    if not entries:
+        print(f"ℹ️  Sin entradas en {SCHEDULE_FILE}")
+    for name, entry in entries.items():
+        print(f"   {name:<28} {entry['cron'].text:<16} {entry['report']:<28} "
+              f"próxima: {entry['cron'].next_after(now):%d/%m/%Y %H:%M}")
+    return True
+
+if __name__ == "__main__":
+    try:
+        sys.exit(0 if main() else 1)
+    except ValueError as e:
+        print(f"❌ {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,105 @@
+"""
+Capturas de pantalla comprimidas y sin bloquear el flujo
+El navegador solo captura la imagen (JPEG por defecto, mucho más barato de
+codificar que PNG); la conversión a WebP y la escritura a disco las hace un
+hilo en segundo plano, de modo que cada paso no espera al disco.
+
+    SCREENSHOT_LEVEL    off | errors | key | all   (por defecto key)
+    SCREENSHOT_FORMAT   jpeg | webp | png          (por defecto jpeg)
+    SCREENSHOT_QUALITY  1-100 para jpeg/webp       (por defecto 70)
+
+WebP necesita Pillow; si no está instalado se guarda en JPEG.
+"""
+
+import threading
+import asyncio
+import atexit
+import queue
+import io
+import os
+
+SCREENSHOT_LEVEL = os.getenv('SCREENSHOT_LEVEL', 'key').lower()
+SCREENSHOT_FORMAT = os.getenv('SCREENSHOT_FORMAT', 'jpeg').lower()
+SCREENSHOT_QUALITY = int(os.getenv('SCREENSHOT_QUALITY', '70'))
+
+# Niveles de captura incluidos en cada SCREENSHOT_LEVEL
+LEVELS = {
+    'off': set(),
+    'errors': {'error'},
+    'key': {'error', 'key'},
+    'all': {'error', 'key', 'step'},
+}
+
+EXTENSIONS = {'jpeg': 'jpg', 'webp': 'webp', 'png': 'png'}
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+if SCREENSHOT_FORMAT == 'webp' and Image is None:
+    print("   ⚠️  SCREENSHOT_FORMAT=webp requiere Pillow; se guardará en JPEG")
+    SCREENSHOT_FORMAT = 'jpeg'
+
+# Capturas pendientes de escribir; si se llena, el flujo espera (sin bloquear el bucle)
+_pending = queue.Queue(maxsize=64)
+_worker = None
+
+def should_capture(level):
+    """True si SCREENSHOT_LEVEL incluye capturas de este nivel ('error', 'key' o 'step')"""
+    return level in LEVELS.get(SCREENSHOT_LEVEL, LEVELS['all'])
+
+def extension():
+    return EXTENSIONS.get(SCREENSHOT_FORMAT, 'png')
+
+def _encode(data):
+    """Convertir la captura JPEG del navegador a WebP"""
+    with Image.open(io.BytesIO(data)) as image:
+        out = io.BytesIO()
+        image.save(out, 'WEBP', quality=SCREENSHOT_QUALITY, method=4)
+        return out.getvalue()
+
+def _write_loop():
+    while True:
+        filepath, data, is_image = _pending.get()
+        try:
+            if is_image and SCREENSHOT_FORMAT == 'webp':
+                data = _encode(data)
+            filepath.write_bytes(data)
+        except Exception as e:
+            print(f"   ⚠️  No se pudo guardar {filepath.name}: {str(e)}")
+        finally:
+            _pending.task_done()
+
+def _ensure_worker():
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = threading.Thread(target=_write_loop, name='screenshot-writer', daemon=True)
+        _worker.start()
+
+async def grab(page):
+    """Capturar la página en el formato configurado (bytes, sin escribir a disco)"""
+    if SCREENSHOT_FORMAT == 'png':
+        return await page.screenshot(type='png')
+    # Para WebP se parte de un JPEG de alta calidad y se recomprime en el hilo
+    quality = 90 if SCREENSHOT_FORMAT == 'webp' else SCREENSHOT_QUALITY
+    return await page.screenshot(type='jpeg', quality=quality)
+
+async def enqueue(filepath, data, is_image=True):
+    """Encolar la escritura de data en filepath para el hilo de escritura"""
+    _ensure_worker()
+    try:
+        _pending.put_nowait((filepath, data, is_image))
+    except queue.Full:
+        await asyncio.to_thread(_pending.put, (filepath, data, is_image))
+
+async def capture(page, filepath):
+    """Capturar la página y encolar la escritura en filepath"""
+    await enqueue(filepath, await grab(page))
+
+def flush():
+    """Esperar a que se escriban las capturas pendientes"""
+    if _worker is not None and _worker.is_alive():
+        _pending.join()
+
+atexit.register(flush)
@@ -0,0 +1,121 @@
+"""
+Resolución de selectores con memoria para el CRM BeyondUp
+Cada elemento lógico (botón Excel, Aceptar de la exportación, entradas de
+menú...) tiene una lista ordenada de selectores candidatos. El que funcionó
+la última vez se guarda en SELECTOR_CACHE_FILE y se prueba primero, de modo
+que en régimen normal cada paso acierta a la primera sin agotar los timeouts
+de los candidatos que fallan. Si el selector guardado deja de funcionar se
+degrada, se promociona el candidato que sí funcionó y se anota el cambio.
+"""
+
+from datetime import datetime
+from pathlib import Path
+import os
+
+from beyondup_common import read_json, write_json
+from beyondup_timeouts import CRMDegraded, within
+
+SELECTOR_CACHE_FILE = Path(os.getenv('SELECTOR_CACHE_FILE', '/tmp/beyondup_selector_cache.json'))
+
+# Cambios de selector que se conservan por elemento
+MAX_HISTORY = 10
+# Timeout (ms) de los candidatos de respaldo: el largo solo para el ganador guardado y el último
+SELECTOR_FALLBACK_TIMEOUT = int(os.getenv('SELECTOR_FALLBACK_TIMEOUT', '3000'))
+
+# Candidatos de los elementos compartidos por varios reportes, en orden de preferencia
+ELEMENTS = {
+    'excel': [
+        'button[title*="Excel"]',
+        'button:has-text("Excel")',
+        'i.fa-file-excel',
+        '.excel-icon',
+        'button[aria-label*="Excel"]',
+    ],
+    # Último botón Aceptar visible: el del popup de confirmación
+    'aceptar_exportacion': [
+        'button:has-text("Aceptar") >> nth=-1',
+        'button:text("Aceptar")',
+        '.ui-button:has-text("Aceptar")',
+        'button[type="button"]:has-text("Aceptar")',
+        '.ui-confirmdialog-yes',
+    ],
+    # En las vistas de tareas cerradas el primero es el del diálogo de filtro
+    'aceptar_exportacion_cerradas': [
+        'button:has-text("Aceptar") >> nth=1',
+        '.ui-confirmdialog-yes',
+        'button:has-text("Aceptar") >> nth=-1',
+    ],
+}
+
+_cache = None
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        _cache = read_json(SELECTOR_CACHE_FILE, {})
+    return _cache
+
+def _save_cache():
+    write_json(SELECTOR_CACHE_FILE, _cache)
+
+def ordered_candidates(element, candidates=None):
+    """Candidatos del elemento con el último selector ganador en primer lugar"""
+    candidates = list(candidates or ELEMENTS[element])
+    winner = _load_cache().get(element, {}).get('selector')
+    if winner in candidates:
+        candidates.remove(winner)
+        candidates.insert(0, winner)
+    return candidates
+
+def _record_winner(element, selector):
+    """Guardar el selector ganador; si cambia, anotar el cambio en el historial"""
+    cache = _load_cache()
+    entry = cache.setdefault(element, {'selector': None, 'history': []})
+    if entry['selector'] == selector:
+        return
+
+    if entry['selector']:
+        print(f"   🔁 Selector de '{element}' actualizado: {entry['selector']} -> {selector}")
+    entry['history'] = (entry['history'] + [{
+        'from': entry['selector'],
+        'to': selector,
+        'at': datetime.now().isoformat(timespec='seconds'),
+    }])[-MAX_HISTORY:]
+    entry['selector'] = selector
+    _save_cache()
+
+async def _present(page, selector):
+    try:
+        return await page.locator(selector).count() > 0
+    except Exception:
+        return False
+
+async def click_element(page, element, candidates=None, timeout=5000, record=None):
+    """
+    Pulsar un elemento lógico probando sus selectores candidatos
+    candidates: lista propia; por defecto la de ELEMENTS[element]
+    timeout: para el selector guardado y el último candidato; el resto usa
+    como mucho SELECTOR_FALLBACK_TIMEOUT para no agotar uno largo por cada fallo
+    record: registro de beyondup_metrics.step(); solo el intento con el selector
+    guardado se limita al tiempo aprendido del paso, no los demás candidatos
+    Devuelve el selector que funcionó; lanza excepción si ninguno lo hace
+    """
+    tried = ordered_candidates(element, candidates)
+    winner = _load_cache().get(element, {}).get('selector')
+    for selector in tried:
+        wait = timeout if selector in (winner, tried[-1]) else min(timeout, SELECTOR_FALLBACK_TIMEOUT)
+        try:
+            if record and selector == winner:
+                await within(record, page.click(selector, timeout=wait))
+            else:
+                await page.click(selector, timeout=wait)
+        except CRMDegraded:
+            # Si el selector guardado ya no está en la página es un fallo de caché, no del CRM
+            if await _present(page, selector):
+                raise
+            continue
+        except Exception:
+            continue
+        _record_winner(element, selector)
+        return selector
+    raise Exception(f"Elemento '{element}' no encontrado ({len(tried)} selectores probados)")
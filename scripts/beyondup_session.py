@@ -0,0 +1,131 @@
+"""
+Sesión persistente de BeyondUp (storage_state)
+Guarda cookies y storage tras un login correcto y los reutiliza en las
+siguientes ejecuciones; si la sesión caducó, vuelve a iniciar sesión y
+refresca el archivo. Varios procesos comparten el archivo mediante un lock.
+"""
+
+from contextlib import asynccontextmanager
+import asyncio
+import fcntl
+
+from beyondup_common import (
+    SESSION_FILE, LOGIN_FORM_SELECTOR,
+    read_json, write_json, retry_operation, new_context, new_page, login
+)
+from beyondup_metrics import step
+from beyondup_guard import crm_action
+
+LOCK_FILE = SESSION_FILE.with_name(SESSION_FILE.name + '.lock')
+
+# flock no excluye a las tareas de un mismo proceso: el login se serializa
+# también dentro del bucle de eventos
+_login_lock = asyncio.Lock()
+
+@asynccontextmanager
+async def session_lock(exclusive=False):
+    """Lock de archivo compartido (lectura) o exclusivo (login y escritura)"""
+    LOCK_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(LOCK_FILE, 'a') as lock:
+        # flock bloquea: se espera en un hilo para no congelar el bucle de eventos
+        await asyncio.to_thread(fcntl.flock, lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def load_session():
+    """Leer la sesión guardada; devuelve None si no existe o está corrupta"""
+    data = read_json(SESSION_FILE, {})
+    return data if data.get('storage_state') and data.get('home_url') else None
+
+async def save_session(context, home_url):
+    """Escribir la sesión de forma atómica (el llamador debe tener el lock exclusivo)"""
+    data = {'home_url': home_url, 'storage_state': await context.storage_state()}
+    write_json(SESSION_FILE, data, mode=0o600)
+
+async def is_login_page(page):
+    """True si la página muestra el formulario de login (sesión caducada)"""
+    return await page.locator(LOGIN_FORM_SELECTOR).count() > 0
+
+async def _try_session(browser, session):
+    """Abrir un contexto con la sesión guardada y validarla contra el CRM"""
+    context = await new_context(browser, storage_state=session['storage_state'])
+    page = await new_page(context)
+    try:
+        await page.goto(session['home_url'])
+        await page.wait_for_load_state('domcontentloaded')
+        if not await is_login_page(page):
+            return context, page
+    except Exception as e:
+        print(f"   ⚠️  No se pudo validar la sesión guardada: {str(e)}")
+    await context.close()
+    return None
+
+async def open_session(browser):
+    """
+    Devolver (context, page, home_url) con una sesión autenticada
+    Reutiliza SESSION_FILE si sigue siendo válida; si no, inicia sesión
+    y guarda la nueva sesión para las siguientes ejecuciones
+    """
+    async with session_lock():
+        session = load_session()
+
+    if session:
+        opened = await _try_session(browser, session)
+        if opened:
+            print("   ♻️  Sesión guardada reutilizada")
+            return opened[0], opened[1], session['home_url']
+        print("   ⌛ La sesión guardada ha caducado")
+
+    async with _login_lock, session_lock(exclusive=True):
+        # Otro proceso pudo refrescar la sesión mientras esperábamos el lock
+        latest = load_session()
+        if latest and latest != session:
+            opened = await _try_session(browser, latest)
+            if opened:
+                print("   ♻️  Sesión refrescada por otro proceso reutilizada")
+                return opened[0], opened[1], latest['home_url']
+
+        context = await new_context(browser)
+        page = await new_page(context)
+        async with crm_action('login'):
+            with step('login'):
+                home_url = await retry_operation(lambda: login(page))
+        if await is_login_page(page):
+            await context.close()
+            raise Exception("Login fallido: el CRM sigue mostrando el formulario de acceso")
+
+        await save_session(context, home_url)
+        print(f"   💾 Sesión guardada en {SESSION_FILE}")
+        return context, page, home_url
+
+async def ensure_logged_in(page, home_url, url=None):
+    """
+    Ir a url (por defecto la página de inicio); si el CRM redirige al login,
+    iniciar sesión de nuevo en el mismo contexto, refrescar el archivo de
+    sesión y volver a url. Con url = el enlace directo de la vista, la
+    comprobación de sesión no cuesta una carga de página aparte
+    Devuelve la URL de inicio (actualizada si hubo que iniciar sesión)
+    """
+    url = url or home_url
+    await page.goto(url)
+    if not await is_login_page(page):
+        return home_url
+
+    async with _login_lock, session_lock(exclusive=True):
+        # Otra tarea pudo renovar ya la sesión de este contexto
+        await page.goto(url)
+        if not await is_login_page(page):
+            return home_url
+
+        print("   ⌛ Sesión caducada, iniciando sesión de nuevo...")
+        async with crm_action('login'):
+            with step('login'):
+                home_url = await retry_operation(lambda: login(page))
+        if await is_login_page(page):
+            raise Exception("Login fallido: el CRM sigue mostrando el formulario de acceso")
+        await save_session(page.context, home_url)
+    if url != home_url:
+        await page.goto(url)
+    return home_url
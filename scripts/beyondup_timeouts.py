@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Timeouts por paso aprendidos de la latencia observada en el CRM BeyondUp
+Cada paso terminado con éxito (navigate, filter, export, confirm...) añade
+su duración a una ventana móvil por reporte y paso. El tiempo máximo de un
+paso es p99 × TIMEOUT_FACTOR, acotado entre TIMEOUT_MIN_MS y TIMEOUT_MAX_MS;
+si se agota, el paso falla enseguida con CRMDegraded (resultado 'degraded'
+en las métricas) en lugar de ocupar una página 60 s por cada espera.
+
+Tras un paso degradado el siguiente margen del mismo paso se duplica, de
+modo que si el CRM se vuelve más lento de forma estable los tiempos se
+reajustan en pocas ejecuciones. Hasta reunir TIMEOUT_MIN_SAMPLES muestras
+se usan los timeouts fijos de siempre.
+
+Uso:
+    python3 beyondup_timeouts.py            # latencias y timeouts aprendidos
+"""
+
+from collections import deque
+from pathlib import Path
+import threading
+import asyncio
+import atexit
+import time
+import sys
+import os
+
+from beyondup_common import TIMEOUT, read_json, write_json
+from beyondup_metrics import on_step, set_gauge
+
+ADAPTIVE_TIMEOUTS = os.getenv('ADAPTIVE_TIMEOUTS', 'true').lower() == 'true'
+TIMEOUT_STATS_FILE = Path(os.getenv('TIMEOUT_STATS_FILE', '/tmp/beyondup_timeout_stats.json'))
+TIMEOUT_FACTOR = float(os.getenv('TIMEOUT_FACTOR', '3'))
+TIMEOUT_MIN_MS = int(os.getenv('TIMEOUT_MIN_MS', '5000'))
+TIMEOUT_MAX_MS = int(os.getenv('TIMEOUT_MAX_MS', str(TIMEOUT)))
+# Duraciones recientes que se conservan por paso y mínimas para confiar en ellas
+TIMEOUT_WINDOW = int(os.getenv('TIMEOUT_WINDOW', '200'))
+TIMEOUT_MIN_SAMPLES = int(os.getenv('TIMEOUT_MIN_SAMPLES', '20'))
+# Intervalo mínimo entre escrituras de TIMEOUT_STATS_FILE (s)
+TIMEOUT_SAVE_INTERVAL = float(os.getenv('TIMEOUT_SAVE_INTERVAL', '30'))
+
+class CRMDegraded(Exception):
+    """Un paso superó el tiempo aprendido: el CRM responde mucho más lento de lo normal"""
+    outcome = 'degraded'
+
+_lock = threading.Lock()
+_stats = None
+_dirty = set()
+_last_save = 0.0
+
+def _key(report, step):
+    return f"{report}:{step}"
+
+def _load():
+    global _stats
+    if _stats is None:
+        _stats = {}
+        for key, entry in (read_json(TIMEOUT_STATS_FILE, {}) or {}).items():
+            _stats[key] = {'samples': deque(entry.get('samples', []), maxlen=TIMEOUT_WINDOW),
+                           'strikes': int(entry.get('strikes', 0))}
+    return _stats
+
+def _entry(key):
+    return _load().setdefault(key, {'samples': deque(maxlen=TIMEOUT_WINDOW), 'strikes': 0})
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def save():
+    """Guardar las ventanas tocadas por este proceso (sin pisar las de otros procesos)"""
+    global _last_save
+    with _lock:
+        if not _dirty:
+            return
+        data = read_json(TIMEOUT_STATS_FILE, {}) or {}
+        for key in _dirty:
+            entry = _stats[key]
+            data[key] = {'samples': list(entry['samples']), 'strikes': entry['strikes']}
+        _dirty.clear()
+        _last_save = time.monotonic()
+    try:
+        write_json(TIMEOUT_STATS_FILE, data)
+    except OSError as e:
+        print(f"   ⚠️  No se pudo escribir {TIMEOUT_STATS_FILE}: {str(e)}")
+
+def observe(record):
+    """Listener de beyondup_metrics: anotar la duración de los pasos correctos"""
+    if record.get('outcome') not in ('ok', 'degraded'):
+        return
+    key = _key(record['report'], record['step'])
+    with _lock:
+        entry = _entry(key)
+        if record['outcome'] == 'ok':
+            entry['samples'].append(record['duration_s'])
+            entry['strikes'] = 0
+        else:
+            entry['strikes'] = min(entry['strikes'] + 1, 6)
+        _dirty.add(key)
+        due = time.monotonic() - _last_save >= TIMEOUT_SAVE_INTERVAL
+    if due:
+        save()
+
+def budget(report, step):
+    """Tiempo máximo (s) de un paso, o None si aún no hay muestras suficientes"""
+    if not ADAPTIVE_TIMEOUTS:
+        return None
+    with _lock:
+        entry = _load().get(_key(report, step))
+        if not entry or len(entry['samples']) < TIMEOUT_MIN_SAMPLES:
+            return None
+        p99 = percentile(entry['samples'], 0.99)
+        strikes = entry['strikes']
+    seconds = p99 * TIMEOUT_FACTOR * 2 ** strikes
+    return min(max(seconds, TIMEOUT_MIN_MS / 1000), TIMEOUT_MAX_MS / 1000)
+
+def typical(report, step):
+    """Duración mediana (s) de un paso, o None si aún no hay muestras suficientes"""
+    with _lock:
+        entry = _load().get(_key(report, step))
+        if not entry or len(entry['samples']) < TIMEOUT_MIN_SAMPLES:
+            return None
+        return percentile(entry['samples'], 0.5)
+
+async def within(record, awaitable):
+    """
+    Esperar una operación dentro del tiempo aprendido para el paso en curso
+    record: el registro de beyondup_metrics.step(); sin muestras suficientes no hay límite extra
+    """
+    seconds = budget(record['report'], record['step'])
+    if seconds is None:
+        return await awaitable
+    set_gauge('beyondup_step_timeout_seconds', round(seconds, 3),
+              'Timeout aprendido de cada paso', report=record['report'], step=record['step'])
+    try:
+        return await asyncio.wait_for(awaitable, seconds)
+    except asyncio.TimeoutError:
+        print(f"   🐢 {record['step']}: sin respuesta en {seconds:.1f}s (lo normal es mucho menos); CRM degradado")
+        raise CRMDegraded(f"CRM degradado: el paso {record['step']} superó {seconds:.1f}s") from None
+
+on_step(observe)
+atexit.register(save)
+
+def main():
+    stats = _load()
+    if not stats:
+        print(f"ℹ️  Sin latencias registradas en {TIMEOUT_STATS_FILE}")
+    for key, entry in sorted(stats.items()):
+        report, _, step = key.rpartition(':')
+        samples = entry['samples']
+        seconds = budget(report, step)
+        limit = f"{seconds:6.1f}s" if seconds is not None else "   fijo"
+        p50 = f"{percentile(samples, 0.5):6.2f}s" if samples else "      -"
+        p99 = f"{percentile(samples, 0.99):6.2f}s" if samples else "      -"
+        strikes = f" ⚠️  {entry['strikes']} degradados" if entry['strikes'] else ""
+        print(f"   {report:<28} {step:<14} n={len(samples):<4} p50={p50} p99={p99} timeout={limit}{strikes}")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,124 @@
+"""
+Esperas conscientes de PrimeFaces/JSF para el CRM BeyondUp
+Sustituyen los time.sleep fijos: cada paso termina en cuanto la cola ajax
+de PrimeFaces está vacía, las peticiones parciales JSF han terminado, no
+hay overlay de bloqueo visible y (si se pide) la tabla se ha re-renderizado.
+Si la señal no llega a tiempo se avisa y se continúa; si la página no
+expone PrimeFaces/jQuery/JSF se recurre a la pausa fija de antes.
+"""
+
+import asyncio
+import os
+
+# Tiempo máximo esperando a que el CRM quede inactivo (ms)
+WAIT_TIMEOUT = int(os.getenv('WAIT_TIMEOUT', '15000'))
+# Tiempo que el CRM debe permanecer inactivo para darlo por listo (ms);
+# cubre el retardo entre el evento y el arranque de la petición ajax
+WAIT_QUIET_MS = int(os.getenv('WAIT_QUIET_MS', '300'))
+
+# Selectores de overlays que bloquean la interfaz mientras el servidor responde
+BLOCKING_OVERLAYS = '.ui-blockui, .ui-blockui-content, .ui-ajax-status .ui-ajax-status-start'
+
+_IDLE_JS = '''
+([quietMs, overlays]) => {
+    // Contar peticiones parciales JSF (begin -> complete/error)
+    if (window.jsf && jsf.ajax && !window.__beyondupJsfHooked) {
+        window.__beyondupJsfPending = 0;
+        jsf.ajax.addOnEvent(e => {
+            if (e.status === 'begin') window.__beyondupJsfPending++;
+            if (e.status === 'complete') window.__beyondupJsfPending = Math.max(0, window.__beyondupJsfPending - 1);
+        });
+        jsf.ajax.addOnError(() => { window.__beyondupJsfPending = 0; });
+        window.__beyondupJsfHooked = true;
+    }
+
+    const queue = window.PrimeFaces && PrimeFaces.ajax && PrimeFaces.ajax.Queue;
+    const queueBusy = queue && (typeof queue.isEmpty === 'function'
+        ? !queue.isEmpty()
+        : (queue.requests || []).length > 0);
+    const jqueryBusy = window.jQuery && jQuery.active > 0;
+    const jsfBusy = (window.__beyondupJsfPending || 0) > 0;
+    const overlayBusy = Array.from(document.querySelectorAll(overlays)).some(el => {
+        const style = getComputedStyle(el);
+        return style.display !== 'none' && style.visibility !== 'hidden' && el.offsetParent !== null;
+    });
+    const busy = queueBusy || jqueryBusy || jsfBusy || overlayBusy || document.readyState !== 'complete';
+
+    const now = Date.now();
+    if (busy) {
+        window.__beyondupIdleSince = null;
+        return false;
+    }
+    window.__beyondupIdleSince = window.__beyondupIdleSince || now;
+    return now - window.__beyondupIdleSince >= quietMs;
+}
+'''
+
+_HAS_SIGNALS_JS = '() => !!(window.PrimeFaces || window.jQuery || window.jsf)'
+
+_RESET_IDLE_JS = '() => { window.__beyondupIdleSince = null; }'
+
+# Filas de la tabla de datos con filtros de columna (la primera si ninguna
+# los tiene); sin tbody genéricos, que también usan calendarios y maquetación
+_TABLE_ROWS_JS = '''
+    const tables = Array.from(document.querySelectorAll('.ui-datatable'));
+    const table = tables.find(t => t.querySelector('thead input[type="text"]')) || tables[0];
+    const rows = table ? Array.from(table.querySelectorAll('.ui-datatable-data > tr'))
+        .filter(row => row.closest('.ui-datatable') === table) : [];
+'''
+
+_MARK_TABLE_JS = '''
+() => {''' + _TABLE_ROWS_JS + '''
+    rows.forEach(row => { row.__beyondupStale = true; });
+    return rows.length;
+}
+'''
+
+_TABLE_REFRESHED_JS = '''
+() => {''' + _TABLE_ROWS_JS + '''
+    return rows.length === 0 || rows.every(row => !row.__beyondupStale);
+}
+'''
+
+async def _has_signals(page):
+    try:
+        return await page.evaluate(_HAS_SIGNALS_JS)
+    except Exception:
+        return False
+
+async def wait_for_ajax(page, fallback=2, timeout=WAIT_TIMEOUT):
+    """
+    Esperar a que el CRM quede inactivo (cola ajax vacía, sin overlay)
+    fallback: pausa fija (s) si la página no expone señales de PrimeFaces/JSF
+    """
+    try:
+        await page.wait_for_load_state('domcontentloaded', timeout=timeout)
+        if not await _has_signals(page):
+            await asyncio.sleep(fallback)
+            return False
+        # Cada espera mide su propio silencio, no el que quedó de la anterior
+        await page.evaluate(_RESET_IDLE_JS)
+        await page.wait_for_function(_IDLE_JS, arg=[WAIT_QUIET_MS, BLOCKING_OVERLAYS],
+                                     timeout=timeout, polling=50)
+        return True
+    except Exception as e:
+        print(f"   ⚠️  El CRM no quedó inactivo a tiempo ({str(e).splitlines()[0]}); se continúa")
+        return False
+
+async def mark_table(page):
+    """Marcar las filas actuales de la tabla antes de una acción que la re-renderiza"""
+    try:
+        return await page.evaluate(_MARK_TABLE_JS)
+    except Exception:
+        return 0
+
+async def wait_for_table_refresh(page, fallback=4, timeout=WAIT_TIMEOUT):
+    """
+    Esperar a que la tabla marcada con mark_table() se re-renderice y el
+    CRM quede inactivo; si no cambia a tiempo, se espera solo a la cola ajax
+    """
+    try:
+        await page.wait_for_function(_TABLE_REFRESHED_JS, timeout=timeout, polling=50)
+    except Exception:
+        print("   ⚠️  La tabla no se re-renderizó a tiempo; esperando a la cola ajax")
+    return await wait_for_ajax(page, fallback=fallback, timeout=timeout)
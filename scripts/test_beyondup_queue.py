@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Pruebas de las concesiones de la cola SQLite de beyondup_queue
+
+    cd scripts && python3 -m unittest test_beyondup_queue
+"""
+
+from pathlib import Path
+import tempfile
+import unittest
+
+from beyondup_queue import JobQueue
+
+class JobQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = JobQueue(Path(self.tmp.name) / 'queue.sqlite3')
+
+    def tearDown(self):
+        self.queue.db.close()
+        self.tmp.cleanup()
+
+    def expire(self, job_id):
+        self.queue.db.execute('UPDATE jobs SET lease_expires = 0 WHERE id = ?', (job_id,))
+
+    def test_lease_takes_oldest_job_once(self):
+        first = self.queue.enqueue('tareas_actuales')
+        second = self.queue.enqueue('tareas_futuras', ranges=[['01/01/2026', '31/03/2026', 'Q1-2026']])
+        job = self.queue.lease('a')
+        self.assertEqual(job['id'], first)
+        self.assertEqual(job['attempts'], 1)
+        job = self.queue.lease('b')
+        self.assertEqual(job['id'], second)
+        # Los rangos vuelven como tuplas (claves del registro de exportaciones)
+        self.assertEqual(job['ranges'], [('01/01/2026', '31/03/2026', 'Q1-2026')])
+        self.assertIsNone(self.queue.lease('c'))
+
+    def test_expired_lease_is_requeued(self):
+        job_id = self.queue.enqueue('tareas_actuales')
+        self.queue.lease('a')
+        self.expire(job_id)
+        job = self.queue.lease('b')
+        self.assertEqual(job['id'], job_id)
+        self.assertEqual(job['owner'], 'b')
+        self.assertEqual(job['attempts'], 2)
+        # El dueño anterior ya no puede renovar ni completar
+        self.assertFalse(self.queue.heartbeat(job_id, 'a'))
+        self.assertFalse(self.queue.complete(job_id, 'a', {'ok': True}))
+        self.assertTrue(self.queue.complete(job_id, 'b', {'ok': True}))
+        self.assertEqual(self.queue.counts(), {'done': 1})
+
+    def test_expired_lease_without_attempts_left_fails(self):
+        job_id = self.queue.enqueue('tareas_actuales', max_attempts=1)
+        self.queue.lease('a')
+        self.expire(job_id)
+        self.assertIsNone(self.queue.lease('b'))
+        self.assertEqual(self.queue.counts(), {'failed': 1})
+
+    def test_heartbeat_extends_the_lease(self):
+        job_id = self.queue.enqueue('tareas_actuales')
+        self.queue.lease('a', seconds=60)
+        self.expire(job_id)
+        self.assertTrue(self.queue.heartbeat(job_id, 'a', seconds=60))
+        # Renovada a tiempo: nadie más la toma
+        self.assertIsNone(self.queue.lease('b'))
+
+    def test_release_returns_job_without_spending_an_attempt(self):
+        job_id = self.queue.enqueue('tareas_actuales')
+        self.queue.lease('a')
+        self.queue.release(job_id, 'a')
+        job = self.queue.lease('b')
+        self.assertEqual(job['id'], job_id)
+        self.assertEqual(job['attempts'], 1)
+
+    def test_failed_result_marks_job_failed(self):
+        job_id = self.queue.enqueue('tareas_actuales')
+        self.queue.lease('a')
+        self.assertTrue(self.queue.complete(job_id, 'a', {'ok': False, 'error': 'Login fallido'}))
+        self.assertEqual(self.queue.recent(1)[0]['error'], 'Login fallido')
+
+if __name__ == '__main__':
+    unittest.main()
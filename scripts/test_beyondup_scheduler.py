@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Pruebas del intérprete de expresiones cron de beyondup_scheduler
+
+    cd scripts && python3 -m unittest test_beyondup_scheduler
+"""
+
+from datetime import datetime
+import unittest
+
+from beyondup_scheduler import CronExpression, _parse_field
+
+class ParseFieldTest(unittest.TestCase):
+
+    def test_wildcard_and_step(self):
+        self.assertEqual(_parse_field('*', 0, 59), set(range(60)))
+        self.assertEqual(_parse_field('*/15', 0, 59), {0, 15, 30, 45})
+
+    def test_lists_and_ranges(self):
+        self.assertEqual(_parse_field('1-5', 0, 7), {1, 2, 3, 4, 5})
+        self.assertEqual(_parse_field('1-10/3', 1, 31), {1, 4, 7, 10})
+        self.assertEqual(_parse_field('0,30,45-47', 0, 59), {0, 30, 45, 46, 47})
+
+    def test_single_value_with_step_runs_to_field_maximum(self):
+        # Como vixie cron: 5/10 equivale a 5-59/10
+        self.assertEqual(_parse_field('5/10', 0, 59), {5, 15, 25, 35, 45, 55})
+        self.assertEqual(_parse_field('5', 0, 59), {5})
+
+    def test_invalid_input(self):
+        for text, low, high in (('60', 0, 59), ('0', 1, 31), ('5-2', 0, 59), ('*/0', 0, 59),
+                                ('*/-1', 0, 59), ('a', 0, 59), ('', 0, 59), ('1,', 0, 59), ('8', 0, 7)):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    _parse_field(text, low, high)
+
+class CronExpressionTest(unittest.TestCase):
+
+    def test_sunday_is_zero_or_seven(self):
+        self.assertEqual(CronExpression('0 7 * * 7').weekdays, {0})
+        self.assertEqual(CronExpression('0 7 * * 0').weekdays, {0})
+        self.assertEqual(CronExpression('0 7 * * 5-7').weekdays, {0, 5, 6})
+
+    def test_next_after_on_weekdays(self):
+        cron = CronExpression('0 7 * * 1-5')
+        # Viernes 16/10/2026 a las 08:00 -> lunes 19/10/2026 a las 07:00
+        self.assertEqual(cron.next_after(datetime(2026, 10, 16, 8, 0)), datetime(2026, 10, 19, 7, 0))
+
+    def test_wrong_number_of_fields(self):
+        with self.assertRaises(ValueError):
+            CronExpression('0 7 * *')
+
+if __name__ == '__main__':
+    unittest.main()